@@ -22,10 +22,13 @@ router = APIRouter()
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "") or os.environ.get("SUPABASE_KEY", "")
+
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 
 MAX_TOOL_ROUNDS = 5  # Max tool use iterations per request
 
+_http = requests.Session()
+
 
 def _sb_headers():
     return {
@@ -37,7 +40,7 @@ def _sb_headers():
 
 
 def _sb_get(table: str, query: str = "") -> list:
-    r = requests.get(
+    r = _http.get(
         f"{SUPABASE_URL}/rest/v1/{table}?{query}",
         headers=_sb_headers(),
     )
@@ -10,7 +10,7 @@ import tempfile
 import requests
 import openpyxl
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 
 from excel_parsers import (
     _parse_catalogo_sheet,
@@ -23,6 +23,8 @@ router = APIRouter()
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "") or os.environ.get("SUPABASE_KEY", "")
 
+_http = requests.Session()
+
 
 def _sb_headers(prefer="return=representation"):
     return {
@@ -34,13 +36,13 @@ def _sb_headers(prefer="return=representation"):
 
 
 def _sb_get(table, query=""):
-    r = requests.get(f"{SUPABASE_URL}/rest/v1/{table}?{query}", headers=_sb_headers())
+    r = _http.get(f"{SUPABASE_URL}/rest/v1/{table}?{query}", headers=_sb_headers())
     r.raise_for_status()
     return r.json()
 
 
 def _sb_post(table, data):
-    r = requests.post(f"{SUPABASE_URL}/rest/v1/{table}", headers=_sb_headers(), json=data)
+    r = _http.post(f"{SUPABASE_URL}/rest/v1/{table}", headers=_sb_headers(), json=data)
     r.raise_for_status()
     result = r.json()
     return result[0] if isinstance(result, list) and result else result
@@ -48,14 +50,14 @@ def _sb_post(table, data):
 
 def _sb_upsert(table, data, on_conflict=""):
     headers = _sb_headers(prefer="return=representation,resolution=merge-duplicates")
-    r = requests.post(f"{SUPABASE_URL}/rest/v1/{table}", headers=headers, json=data)
+    r = _http.post(f"{SUPABASE_URL}/rest/v1/{table}", headers=headers, json=data)
     r.raise_for_status()
     result = r.json()
     return result[0] if isinstance(result, list) and result else result
 
 
 def _sb_delete(table, query):
-    r = requests.delete(
+    r = _http.delete(
         f"{SUPABASE_URL}/rest/v1/{table}?{query}",
         headers=_sb_headers(),
     )
@@ -69,9 +71,10 @@ def download_template():
     """Genera y descarga template Excel para importar pedido semanal."""
     from template_generator import generate_template
 
-    buf = generate_template()
-    return StreamingResponse(
-        buf,
+    # El xlsx ya esta en memoria (y cacheado): Response lo manda de una vez con
+    # Content-Length, en vez de que StreamingResponse lo itere en pedazos
+    return Response(
+        content=generate_template().getvalue(),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=template_pedido.xlsx"},
     )
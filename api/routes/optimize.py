@@ -26,6 +26,9 @@ router = APIRouter()
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "") or os.environ.get("SUPABASE_KEY", "")
 
+# Sesion keep-alive compartida para el REST de Supabase
+_http = requests.Session()
+
 
 def _sb_headers():
     return {
@@ -38,7 +41,7 @@ def _sb_headers():
 
 def _sb_get(table: str, query: str = "") -> list:
     """GET a Supabase REST API."""
-    r = requests.get(
+    r = _http.get(
         f"{SUPABASE_URL}/rest/v1/{table}?{query}",
         headers=_sb_headers(),
     )
@@ -48,7 +51,7 @@ def _sb_get(table: str, query: str = "") -> list:
 
 def _sb_post(table: str, data: dict) -> dict:
     """POST a Supabase REST API."""
-    r = requests.post(
+    r = _http.post(
         f"{SUPABASE_URL}/rest/v1/{table}",
         headers=_sb_headers(),
         json=data,
@@ -69,7 +72,7 @@ def _compute_resource_capacity() -> dict:
     machines = _sb_get("robots", "select=id,estado,area")
     tipos = _sb_get("robot_tipos", "select=robot_id,tipo")
     fabricas = _sb_get("fabricas", "select=es_maquila")
-    op_count_resp = requests.get(
+    op_count_resp = _http.get(
         f"{SUPABASE_URL}/rest/v1/operarios?select=id&activo=eq.true",
         headers={**_sb_headers(), "Prefer": "count=exact"},
     )
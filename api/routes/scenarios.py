@@ -19,6 +19,8 @@ router = APIRouter()
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "") or os.environ.get("SUPABASE_KEY", "")
 
+_http = requests.Session()
+
 
 def _sb_headers():
     return {
@@ -30,7 +32,7 @@ def _sb_headers():
 
 
 def _sb_get(table: str, query: str = "") -> list:
-    r = requests.get(f"{SUPABASE_URL}/rest/v1/{table}?{query}", headers=_sb_headers())
+    r = _http.get(f"{SUPABASE_URL}/rest/v1/{table}?{query}", headers=_sb_headers())
     if r.status_code == 400:
         return []
     r.raise_for_status()
@@ -38,7 +40,7 @@ def _sb_get(table: str, query: str = "") -> list:
 
 
 def _sb_patch(table: str, query: str, data: dict):
-    r = requests.patch(
+    r = _http.patch(
         f"{SUPABASE_URL}/rest/v1/{table}?{query}",
         headers=_sb_headers(),
         json=data,
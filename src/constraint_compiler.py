@@ -112,6 +112,31 @@ class CompiledConstraints:
     # Warnings generados durante compilacion
     warnings: list = field(default_factory=list)
 
+    # Indices derivados, armados al primer uso (despues de compilar) y
+    # reutilizados por cada dia de schedule_week en vez de re-escanear.
+    _block_availability_by_day: dict = field(default=None, init=False,
+                                             repr=False, compare=False)
+    _precedence_counts: dict = field(default=None, init=False,
+                                     repr=False, compare=False)
+
+    def blocks_allowed_on(self, day_name: str) -> dict:
+        """{codigo: bloques_permitidos} de block_availability para un dia."""
+        if self._block_availability_by_day is None:
+            by_day = {}
+            for (code, dia), blocks in self.block_availability.items():
+                by_day.setdefault(dia, {})[code] = blocks
+            self._block_availability_by_day = by_day
+        return self._block_availability_by_day.get(day_name, {})
+
+    def precedence_count(self, modelo_code) -> int:
+        """Numero de reglas de precedencia del modelo (para escalar buffers)."""
+        if self._precedence_counts is None:
+            counts = {}
+            for (mc, _, _, _) in self.precedences:
+                counts[str(mc)] = counts.get(str(mc), 0) + 1
+            self._precedence_counts = counts
+        return self._precedence_counts.get(str(modelo_code), 0)
+
 
 def compile_constraints(restricciones: list, avance_data: dict,
                         models: list, days: list,
@@ -155,6 +155,10 @@ def assign_operators_day(day_schedule: list, operarios: list,
     # Pre-computar escasez de recurso para scoring inteligente
     recurso_scarcity = _compute_recurso_scarcity(tasks, available)
 
+    # Candidatos estaticos por firma (recurso, robots): se calculan una vez
+    # y se reutilizan en todas las tareas/bloques con la misma firma
+    candidate_pool = {}
+
     # ===================================================================
     # CASCADA: bloque por bloque, secuencial
     # ===================================================================
@@ -182,8 +186,9 @@ def assign_operators_day(day_schedule: list, operarios: list,
 
         # --- Asignar un operario libre a cada tarea ---
         for task in needy:
+            candidate_ids = _candidate_ops(task, op_states, candidate_pool)
             _commit_operator(task, b, num_blocks, op_states, robot_usage,
-                             op_block_map, recurso_scarcity)
+                             op_block_map, recurso_scarcity, candidate_ids)
 
     # ===================================================================
     # RELEVO: reasignar operarios via intercambio (post-cascada)
@@ -298,14 +303,37 @@ def _diagnose_unassigned(task, block, op_states, robot_usage, op_block_map,
 # Asignacion con compromiso total
 # ---------------------------------------------------------------------------
 
+def _candidate_ops(task, op_states, pool):
+    """Operarios que por recurso/robots podrian hacer la tarea (filtro estatico).
+
+    Cachea en pool por firma (recurso, robots) para no repetir el filtro
+    en tareas gemelas (hc > 1) ni en bloques posteriores. El estado
+    dinamico (ocupado, bloques usados, robot libre) se valida aparte.
+    """
+    recurso = task["recurso"]
+    robots_needed = task["robots_available"]
+    key = (recurso, tuple(sorted(robots_needed)))
+    ids = pool.get(key)
+    if ids is None:
+        ids = [
+            op_id for op_id, op_st in op_states.items()
+            if _recurso_match(recurso, op_st["recursos"])
+            and (not robots_needed or op_st["robots"].intersection(robots_needed))
+        ]
+        pool[key] = ids
+    return ids
+
+
 def _commit_operator(task, start_block, num_blocks, op_states, robot_usage,
-                     op_block_map, recurso_scarcity=None):
+                     op_block_map, recurso_scarcity=None, candidate_ids=None):
     """
     Busca un operario libre y lo COMPROMETE a toda la tarea restante.
     El operario queda ocupado desde start_block hasta el ultimo bloque activo.
     Usa op_block_map para verificar que no haya doble asignacion.
     recurso_scarcity: dict opcional de escasez por recurso para penalizar
     uso de operarios multi-skill en tareas de recurso abundante.
+    candidate_ids: lista opcional de operarios pre-filtrados por recurso/robots
+    (ver _candidate_ops); si es None se revisan todos.
     """
     recurso = task["recurso"]
     robots_needed = task["robots_available"]
@@ -322,12 +350,16 @@ def _commit_operator(task, start_block, num_blocks, op_states, robot_usage,
     span_blocks = list(range(start_block, last_active + 1))
 
     # Buscar candidatos
+    if candidate_ids is None:
+        candidate_ids = [
+            op_id for op_id, op_st in op_states.items()
+            if _recurso_match(recurso, op_st["recursos"])
+        ]
     candidates = []
-    for op_id, op_st in op_states.items():
+    for op_id in candidate_ids:
+        op_st = op_states[op_id]
         if op_st["current_task"] is not None:
             continue  # OCUPADO - no puede tomar otra tarea
-        if not _recurso_match(recurso, op_st["recursos"]):
-            continue
 
         # Verificar que no tenga bloques ocupados (doble asignacion)
         used = op_block_map.get(op_st["nombre"], set())
@@ -18,14 +18,18 @@ Restricciones:
   6. Contiguidad: una vez detenida, una operacion no puede reiniciar
 
 Objetivo:
-  tardiness(100k) > hc_overflow(50k) > uniformity(5k) > idle(500) > balance(1)
-  Uniformidad: SUAVE - penalty por producir menos del rate (manual y robot)
+  Pesos: tardiness 1M/par, hc_overflow 50/seg, idle 1.5k/seg, balance 10
+  Uniformidad: DURA - multiplos exactos del rate por bloque (seccion 7), sin
+    variables de shortfall ni penalty por bloque
   HC/Recurso: SUAVE - penalty por exceder plantilla o capacidad de recurso
   Idle: SUAVE - penalty por no usar toda la plantilla (incentiva multi-HC)
   Balance: minimiza el pico de HC para distribuir trabajo en todos los bloques
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import copy
+import json
+import os
+import numpy as np
 from ortools.sat.python import cp_model
 
 # Pesos del objetivo (defaults, overridden by params if available)
@@ -35,13 +39,23 @@ from ortools.sat.python import cp_model
 # tardiness=1M domina cualquier overflow razonable (>5x) y fuerza producción
 # parcial siempre que sea físicamente posible.
 _W_TARDINESS = 1_000_000   # por par no completado en el dia
-_W_UNIFORMITY = 5_000      # soft uniformity (por par de shortfall)
+_W_UNIFORMITY = 5_000      # LEGACY: uniformidad es dura (seccion 7), sin shortfall
 _W_HC_OVERFLOW = 50         # por segundo de exceso sobre plantilla/recurso por bloque
                             # (50 * 3600s = 180k por persona-bloque, ahora claramente < tardiness)
 _W_OP_CAP_OVERFLOW = 5_000  # LEGACY: kept for params override; used only if op_capacity is soft
 _W_IDLE = 1_500            # por segundo de capacidad ociosa (moderado, no domina W_EARLY)
 _W_BALANCE = 10            # minimizar pico de HC (suave)
 
+# Parametros CP-SAT del scheduler diario (overridable via params["solver_params"]
+# para barridos). linearization_level=0: relajacion mas ligera, mejor a tiempo fijo.
+_SOLVER_PARAMS = {
+    "linearization_level": 0,
+}
+
+# Atajo de dias holgados: la demanda (HC, recurso, robot) debe caber en esta
+# fraccion de la capacidad del dia para intentar el greedy sin CP-SAT.
+_FAST_PATH_SLACK = 0.85
+
 
 class _EarlyStopCallback(cp_model.CpSolverSolutionCallback):
     """Detiene el solver despues de optimizar objetivos secundarios.
@@ -50,21 +64,47 @@ class _EarlyStopCallback(cp_model.CpSolverSolutionCallback):
     para mejorar uniformidad, early_start y otros objetivos suaves.
     Sin esto, la primera solucion sin tardiness gana aunque tenga
     huecos enormes en el programa.
+
+    Ademas corta la busqueda estancada: si pasan NO_IMPROVE_SECONDS sin una
+    mejora relevante del objetivo (>= MIN_REL_IMPROVEMENT), para aunque siga
+    habiendo tardiness. CP-SAT solo llama al callback con soluciones nuevas,
+    asi que el corte se evalua al llegar la siguiente (mejora marginal).
     """
 
     GRACE_SECONDS = 15.0  # tiempo adicional tras 0-tardiness para explorar mejor distribucion
+    NO_IMPROVE_SECONDS = 10.0  # sin mejora relevante por este tiempo -> parar
+    MIN_REL_IMPROVEMENT = 0.001  # mejora relativa minima que reinicia el reloj
 
     def __init__(self, tardiness_vars):
         super().__init__()
-        self._tardiness_vars = tardiness_vars
+        # Indices de las variables (una vez): el callback lee cada valor con
+        # SolutionIntegerValue(idx) sin pasar por la evaluacion de Value()
+        self._tard_indices = [t.Index() for t in tardiness_vars]
         self._first_zero_time = None
+        self._best_obj = None
+        self._last_improve_time = None
 
     def on_solution_callback(self):
-        total_tard = sum(self.Value(t) for t in self._tardiness_vars)
+        now = self.WallTime()
+        try:
+            obj = self.ObjectiveValue()
+        except Exception:
+            obj = None
+        if obj is not None:
+            if (self._best_obj is None
+                    or self._best_obj - obj >= self.MIN_REL_IMPROVEMENT * abs(self._best_obj)):
+                self._best_obj = obj
+                self._last_improve_time = now
+            elif now - self._last_improve_time >= self.NO_IMPROVE_SECONDS:
+                self.StopSearch()
+                return
+
+        value_of = self.SolutionIntegerValue
+        total_tard = sum(value_of(idx) for idx in self._tard_indices)
         if total_tard == 0:
             if self._first_zero_time is None:
-                self._first_zero_time = self.WallTime()
-            elif self.WallTime() - self._first_zero_time >= self.GRACE_SECONDS:
+                self._first_zero_time = now
+            elif now - self._first_zero_time >= self.GRACE_SECONDS:
                 self.StopSearch()
 
 
@@ -151,32 +191,163 @@ def schedule_day(models_day: list, params: dict, compiled=None,
                      params.get("operator_capacity"),
                      enforce_hc_stability=params.get("enforce_hc_stability", False))
 
-    # Construir indices
-    all_ops = []  # (m_idx, op_idx, model, op)
+    # Lookups planos por bloque y por [m][op] (una sola vez): los loops de
+    # construccion indexan listas en vez de re-leer dicts de op/time_blocks.
+    blk_min = [tb["minutes"] for tb in time_blocks]
+    blk_sec = [bm * 60 for bm in blk_min]
+    op_sec = [[op["sec_per_pair"] for op in model["operations"]]
+              for model in models_day]
+    op_robots = [[op.get("robots", []) for op in model["operations"]]
+                 for model in models_day]
+    op_hc = [[1 if op.get("robots", []) else op.get("max_hc", 1)
+              for op in model["operations"]] for model in models_day]
+    # Todas las (m, op) del dia en orden, con su sec_per_pair en paralelo,
+    # para las sumas por bloque sobre todo el dia (carga total, HC pico)
+    all_ops = [(m_idx, op_idx) for m_idx, model in enumerate(models_day)
+               for op_idx in range(len(model["operations"]))]
+    all_ops_sec = [op_sec[m_idx][op_idx] for m_idx, op_idx in all_ops]
+    # rate_pb[m][op][b] = pares que produce 1 persona en el bloque b
+    rate_pb_of = [[[int(op["rate"] * bm / 60) for bm in blk_min]
+                   for op in model["operations"]] for model in models_day]
+    # Ops manuales (sin robot) agrupadas por recurso y por parte de recurso
+    # compuesto ("PLANA,POSTE" cuenta en PLANA y en POSTE), en orden de
+    # aparicion, con la capacidad de cada recurso resuelta una vez.
+    manual_ops_by_recurso = {}  # recurso -> [(m_idx, op_idx)]
+    manual_ops_by_part = {}     # parte -> [(m_idx, op_idx)]
     for m_idx, model in enumerate(models_day):
         for op_idx, op in enumerate(model["operations"]):
-            all_ops.append((m_idx, op_idx, model, op))
+            if op_robots[m_idx][op_idx]:
+                continue
+            recurso = op["recurso"]
+            manual_ops_by_recurso.setdefault(recurso, []).append((m_idx, op_idx))
+            parts = [p.strip() for p in recurso.split(",")] if "," in recurso else [recurso]
+            for part in parts:
+                manual_ops_by_part.setdefault(part, []).append((m_idx, op_idx))
+    recurso_cap = {recurso: _resource_cap_for(recurso, plantilla, resource_cap)
+                   for recurso in manual_ops_by_recurso}
+
+    # Bloques productivos (excluir bloques con 0 minutos, e.g. COMIDA).
+    # En COMIDA no se crean variables: x/active/hc_used/y apuntan a una
+    # constante 0 y las restricciones solo recorren real_blocks.
+    real_blocks = [b for b in range(num_blocks) if blk_min[b] > 0]
+
+    day_name = params.get("day_name", "")
+
+    # Block availability (retraso de material con hora especifica):
+    # {codigo: bloques_permitidos} del dia, aplicado como tope 0 en x_ub.
+    allowed_by_code = {}
+    if compiled and day_name and compiled.block_availability:
+        allowed_by_code = compiled.blocks_allowed_on(day_name)
+
+    # Maquila delivery: fracciones post-maquila no producen antes del bloque
+    # de entrega. {codigo: [(restr_block, min_frac)]} del dia, tope 0 en x_ub.
+    maquila_by_code = {}
+    if compiled and day_name and compiled.maquila_block_restriction:
+        for (restr_code, restr_day, restr_block, min_frac) in compiled.maquila_block_restriction:
+            if restr_day == day_name:
+                maquila_by_code.setdefault(restr_code, []).append((restr_block, min_frac))
+
+    # Robots deshabilitados (compiled.disabled_robots) en este dia:
+    # {robot: bloques} que se aplican como dominio [0, 0] de y y
+    # recortan x_ub de la operacion.
+    disabled_by_robot = {}
+    if compiled and day_name and compiled.disabled_robots:
+        for robot_name, day_blocks in compiled.disabled_robots.items():
+            if day_blocks.get(day_name):
+                disabled_by_robot[robot_name] = set(day_blocks[day_name])
+
+    # x_ub[m, op, b] = tope de pares por bloque: limite por rate del bloque
+    # (robots: 1 persona; manuales: rate * max_hc), acotado por pares_dia;
+    # 0 en bloques no permitidos para el modelo o antes de la entrega de maquila.
+    # Ops con robot: ademas <= suma de las cotas de sus robots habilitados en
+    # el bloque (0 si estan todos deshabilitados: no se crea x).
+    # Los bloques permitidos se filtran una vez por modelo (no por op y bloque);
+    # cada op solo recorta el prefijo anterior a su entrega de maquila.
+    x_ub = {}
+    for m_idx, model in enumerate(models_day):
+        pares_dia = model["pares_dia"]
+        allowed_blocks = allowed_by_code.get(model.get("codigo", ""))
+        model_blocks = (real_blocks if allowed_blocks is None
+                        else [b for b in real_blocks if b in allowed_blocks])
+        maquila_restr = maquila_by_code.get(model.get("codigo", ""), [])
+        for op_idx, op in enumerate(model["operations"]):
+            hc_mult = op_hc[m_idx][op_idx]
+            rates = rate_pb_of[m_idx][op_idx]
+            for b in range(num_blocks):
+                x_ub[m_idx, op_idx, b] = 0
+            op_blocks = model_blocks
+            if maquila_restr:
+                frac = op.get("fraccion", 0)
+                first_block = max([rb for rb, mf in maquila_restr if frac >= mf],
+                                  default=0)
+                op_blocks = [b for b in model_blocks if b >= first_block]
+            robots = op_robots[m_idx][op_idx]
+            sec = op_sec[m_idx][op_idx]
+            for b in op_blocks:
+                ub = min(pares_dia, rates[b] * hc_mult)
+                if robots:
+                    n_enabled = sum(1 for r in robots
+                                    if b not in disabled_by_robot.get(r, ()))
+                    per_robot = int(blk_sec[b] // sec) if sec > 0 else ub
+                    ub = min(ub, n_enabled * per_robot)
+                x_ub[m_idx, op_idx, b] = ub
+
+    # Atajo para dias holgados: si la demanda cabe con margen y el greedy
+    # cumple todas las restricciones duras, se devuelve sin llamar a CP-SAT.
+    if params.get("fast_path", True) and _day_is_slack(
+            models_day, params, compiled, reserved_robots, real_blocks,
+            blk_sec, op_sec, op_robots):
+        fast = _greedy_day_solution(models_day, params, x_ub, real_blocks,
+                                    blk_sec, op_sec, op_robots, op_hc,
+                                    rate_pb_of)
+        if fast is not None:
+            print("    [FAST] dia holgado: greedy factible sin tardiness, "
+                  "se omite CP-SAT")
+            return _fixed_day_result(fast, models_day, time_blocks, plantilla,
+                                     resource_cap)
 
     solver_model = cp_model.CpModel()
+    zero = solver_model.NewConstant(0)
 
     # --- Variables ---
 
-    # x[m, op, b] = pares producidos
+    # x[m, op, b] = pares producidos (dominio [0, x_ub]). Solo se crea
+    # variable donde x_ub > 0 (bloque productivo, permitido y con rate); el
+    # resto apunta a la constante 0 y las sumas la absorben.
+    # En ops manuales x solo puede ser rate * hc o step * hc (seccion 7):
+    # el dominio se crea ya con esos multiplos.
     x = {}
     for m_idx, model in enumerate(models_day):
-        pares_dia = model["pares_dia"]
-        max_per_block = pares_dia  # upper bound
-        for op_idx, op in enumerate(model["operations"]):
+        for op_idx in range(len(model["operations"])):
+            manual = not op_robots[m_idx][op_idx]
             for b in range(num_blocks):
-                x[m_idx, op_idx, b] = solver_model.NewIntVar(
-                    0, max_per_block, f"x_{m_idx}_{op_idx}_{b}"
-                )
+                x[m_idx, op_idx, b] = zero
+            for b in real_blocks:
+                ub = x_ub[m_idx, op_idx, b]
+                if ub == 0:
+                    continue
+                name = f"x_{m_idx}_{op_idx}_{b}"
+                if manual:
+                    rate_pb = rate_pb_of[m_idx][op_idx][b]
+                    step_pb = min(step, rate_pb)
+                    values = sorted({v for k in range(op_hc[m_idx][op_idx] + 1)
+                                     for v in (rate_pb * k, step_pb * k) if v <= ub})
+                    x[m_idx, op_idx, b] = solver_model.NewIntVarFromDomain(
+                        cp_model.Domain.FromValues(values), name)
+                else:
+                    x[m_idx, op_idx, b] = solver_model.NewIntVar(0, ub, name)
 
-    # active[m, op, b] = 1 si se producen pares
+    # active[m, op, b] = 1 si se producen pares. Donde x_ub = 0 (rate 0 o
+    # bloque no permitido) la operacion no puede producir: active y hc_used
+    # quedan en la constante 0 y no llevan restricciones de enlace.
     active = {}
     for m_idx, model in enumerate(models_day):
         for op_idx in range(len(model["operations"])):
             for b in range(num_blocks):
+                active[m_idx, op_idx, b] = zero
+            for b in real_blocks:
+                if x_ub[m_idx, op_idx, b] == 0:
+                    continue
                 active[m_idx, op_idx, b] = solver_model.NewBoolVar(
                     f"act_{m_idx}_{op_idx}_{b}"
                 )
@@ -184,29 +355,47 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     # hc_used[m, op, b] = personas asignadas (entero, fuerza x = rate * hc_used)
     hc_used = {}
     for m_idx, model in enumerate(models_day):
-        for op_idx, op in enumerate(model["operations"]):
-            is_robot = bool(op.get("robots", []))
-            max_hc_val = 1 if is_robot else op.get("max_hc", 1)
+        for op_idx in range(len(model["operations"])):
+            max_hc_val = op_hc[m_idx][op_idx]
             for b in range(num_blocks):
+                hc_used[m_idx, op_idx, b] = zero
+            for b in real_blocks:
+                if x_ub[m_idx, op_idx, b] == 0:
+                    continue
                 hc_used[m_idx, op_idx, b] = solver_model.NewIntVar(
                     0, max_hc_val, f"hu_{m_idx}_{op_idx}_{b}"
                 )
 
     # y[m, op, r, b] = pares en robot r (solo para ops con robots asignados)
+    # Cota: rate del bloque y capacidad del robot (y * sec_per_pair <= block_sec);
+    # constante 0 si el robot esta deshabilitado en ese bloque o x_ub = 0.
     y = {}
+    y_ub = {}  # cota de cada y creada (para el warm start)
     robot_ops_idx = []  # lista de (m_idx, op_idx) que tienen robots
     for m_idx, model in enumerate(models_day):
-        for op_idx, op in enumerate(model["operations"]):
-            robots = op.get("robots", [])
+        for op_idx in range(len(model["operations"])):
+            robots = op_robots[m_idx][op_idx]
             if not robots:
                 continue
             robot_ops_idx.append((m_idx, op_idx))
             pares_dia = model["pares_dia"]
+            rates = rate_pb_of[m_idx][op_idx]
+            sec = op_sec[m_idx][op_idx]
             for r in robots:
+                disabled = disabled_by_robot.get(r, ())
                 for b in range(num_blocks):
+                    y[m_idx, op_idx, r, b] = zero
+                for b in real_blocks:
+                    if b in disabled or x_ub[m_idx, op_idx, b] == 0:
+                        continue  # queda en la constante 0
+                    ub = min(pares_dia, rates[b])
+                    if sec > 0:
+                        ub = min(ub, blk_sec[b] // sec)
                     y[m_idx, op_idx, r, b] = solver_model.NewIntVar(
-                        0, pares_dia, f"y_{m_idx}_{op_idx}_{r}_{b}"
+                        0, ub,
+                        f"y_{m_idx}_{op_idx}_{r}_{b}"
                     )
+                    y_ub[m_idx, op_idx, r, b] = ub
 
     # Per-operation tardiness: each operation can have different completion.
     # Cascade ensures earlier ops have less tardiness (more production).
@@ -216,74 +405,63 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     tardiness = {}  # model-level (= last op's tardiness, for rezago)
     for m_idx, model in enumerate(models_day):
         n_ops = len(model["operations"])
-        for op_idx in range(n_ops):
-            op_tardiness[m_idx, op_idx] = solver_model.NewIntVar(
-                0, model["pares_dia"], f"otard_{m_idx}_{op_idx}"
-            )
+        pares_dia = model["pares_dia"]
+        # Cota inferior: lo que ni produciendo al tope en cada bloque cabe
+        # (la operacion con menor capacidad del dia define el minimo atraso)
+        op_cap = [sum(x_ub[m_idx, op_idx, b] for b in real_blocks)
+                  for op_idx in range(n_ops)]
+        tard_lb = max(0, pares_dia - min(op_cap)) if op_cap else 0
         # Equal tardiness: all ops produce the same amount within the day.
         # EXCEPTION: models with POST ops on conveyor may be bottlenecked
         # by conveyor availability, so allow independent tardiness for those.
-        tardiness[m_idx] = solver_model.NewIntVar(
-            0, model["pares_dia"], f"tard_{m_idx}"
-        )
         has_post = any(
             op.get("input_o_proceso", "").startswith("POST")
             for op in model["operations"]
         )
         if has_post and lineas_post > 0:
-            # Model with POST on conveyor: use last op's tardiness (original behavior)
-            if n_ops > 0:
-                solver_model.Add(
-                    tardiness[m_idx] == op_tardiness[m_idx, n_ops - 1]
+            # Model with POST on conveyor: each op has its own tardiness and
+            # the model's is the last op's (original behavior)
+            for op_idx in range(n_ops):
+                op_tardiness[m_idx, op_idx] = solver_model.NewIntVar(
+                    max(0, pares_dia - op_cap[op_idx]), pares_dia,
+                    f"otard_{m_idx}_{op_idx}"
                 )
+            tardiness[m_idx] = op_tardiness[m_idx, n_ops - 1]
         else:
-            # No conveyor constraint: force equal production across all fracs
+            # No conveyor constraint: equal production across all fracs, so
+            # every op shares the model's tardiness var (no per-op copies)
+            tardiness[m_idx] = solver_model.NewIntVar(
+                tard_lb, pares_dia, f"tard_{m_idx}"
+            )
             for op_idx in range(n_ops):
-                solver_model.Add(
-                    op_tardiness[m_idx, op_idx] == tardiness[m_idx]
-                )
+                op_tardiness[m_idx, op_idx] = tardiness[m_idx]
 
-    # --- Restricciones compiladas (block_availability + disabled_robots) ---
-    day_name = params.get("day_name", "")
+    # Sobreproduccion maxima por modelo: limitada a 15% del pares_dia (solo
+    # para redondeo de bloques). Se usa en la cota de cum y en la restriccion 1.
+    max_over = {}
+    for m_idx, model in enumerate(models_day):
+        rate_max = max(
+            int(op["rate"] * op.get("max_hc", 1))
+            for op in model["operations"]
+        ) if model["operations"] else 0
+        max_over[m_idx] = min(rate_max, max(10, int(model["pares_dia"] * 0.15)))
 
-    # Block availability: retraso de material con hora especifica
-    if compiled and day_name and compiled.block_availability:
-        for m_idx, model in enumerate(models_day):
-            modelo_code = model.get("codigo", "")
-            key = (modelo_code, day_name)
-            if key in compiled.block_availability:
-                allowed_blocks = compiled.block_availability[key]
-                for op_idx in range(len(model["operations"])):
-                    for b in range(num_blocks):
-                        if b not in allowed_blocks:
-                            solver_model.Add(x[m_idx, op_idx, b] == 0)
-
-    # Maquila delivery: post-maquila fractions can't produce before delivery block
-    if compiled and day_name and compiled.maquila_block_restriction:
-        for (restr_code, restr_day, restr_block, min_frac) in compiled.maquila_block_restriction:
-            if restr_day != day_name:
-                continue
-            for m_idx, model in enumerate(models_day):
-                if model.get("codigo", "") != restr_code:
-                    continue
-                for op_idx, op in enumerate(model["operations"]):
-                    if op.get("fraccion", 0) >= min_frac:
-                        for b in range(min(restr_block, num_blocks)):
-                            solver_model.Add(x[m_idx, op_idx, b] == 0)
+    # cum[m, op] = pares acumulados por bloque de las operaciones que aparecen
+    # en precedencias (prefijo: cum[b] = cum[b-1] + x[b]), creado al primer
+    # uso. Cada comparacion por bloque es una fila de 2 variables en vez de
+    # dos sumas de b+1 terminos (O(B) en vez de O(B^2)).
+    cum = {}
 
-    # Disabled robots: forzar y[m, op, robot, b] == 0 para robots no disponibles
-    if compiled and day_name and compiled.disabled_robots:
-        for robot_name, day_blocks in compiled.disabled_robots.items():
-            if day_name in day_blocks:
-                blocked_blocks = day_blocks[day_name]
-                for m_idx, op_idx in robot_ops_idx:
-                    op = models_day[m_idx]["operations"][op_idx]
-                    if robot_name in op.get("robots", []):
-                        for b in range(num_blocks):
-                            if b in blocked_blocks:
-                                key = (m_idx, op_idx, robot_name, b)
-                                if key in y:
-                                    solver_model.Add(y[key] == 0)
+    # Restricciones compiladas: block_availability y entrega de maquila ya
+    # estan en x_ub, disabled_robots en el dominio de y.
+
+    # Modelos del dia por prefijo de codigo: una regla con modelo "60000"
+    # aplica a "60000 NG", "60000 NE", ... (lookup en vez de startswith).
+    models_by_prefix = {}
+    for m_idx, model in enumerate(models_day):
+        code = model.get("codigo", "")
+        for k in range(len(code) + 1):
+            models_by_prefix.setdefault(code[:k], []).append(m_idx)
 
     # Precedencia entre operaciones: fracciones_origen deben llevar
     # buffer de ventaja acumulativa sobre cada fraccion en fracciones_destino.
@@ -293,21 +471,9 @@ def schedule_day(models_day: list, params: dict, compiled=None,
             for op_idx, op in enumerate(model["operations"]):
                 frac_to_op[(m_idx, op["fraccion"])] = op_idx
 
-        # Pre-count precedence rules per model to scale buffers.
-        # With N rules each having buffer B, total startup = N*B.
-        # If N*B > pares_dia, the pipeline is infeasible.
-        # Scale each buffer so total startup <= pares_dia * 0.4.
-        prec_count_per_model = {}
-        for (mc, _, _, _) in compiled.precedences:
-            prec_count_per_model[str(mc)] = prec_count_per_model.get(str(mc), 0) + 1
-
-        for (modelo_code, fracs_orig, fracs_dest, buffer) in compiled.precedences:
-            target_m = None
-            for m_idx, model in enumerate(models_day):
-                code = model.get("codigo", "")
-                if code == modelo_code or code.startswith(str(modelo_code)):
-                    target_m = m_idx
-                    break
+        for prec_idx, (modelo_code, fracs_orig, fracs_dest, buffer) in enumerate(compiled.precedences):
+            matches = models_by_prefix.get(str(modelo_code))
+            target_m = matches[0] if matches else None
             if target_m is None:
                 print(f"    [PREC] modelo {modelo_code} no encontrado en models_day, skip")
                 continue
@@ -327,7 +493,7 @@ def schedule_day(models_day: list, params: dict, compiled=None,
                     print(f"    [PREC-DIA] {modelo_code}: F{fracs_orig}->F{fracs_dest} buffer=1dia, "
                           f"bloqueando destino ops {idx_dest} completamente hoy (origen presente)")
                     for op_d in idx_dest:
-                        for b in range(num_blocks):
+                        for b in real_blocks:
                             solver_model.Add(x[target_m, op_d, b] == 0)
                 elif not idx_orig and idx_dest:
                     # Origin NOT in today's schedule (done on previous day) → destination free
@@ -341,10 +507,12 @@ def schedule_day(models_day: list, params: dict, compiled=None,
             if effective_buffer < 0:
                 effective_buffer = pares_dia_m
             # Scale buffer so total startup across all rules stays feasible.
-            # With N rules, each buffer is capped at pares_dia * 0.4 / N.
+            # With N rules each having buffer B, total startup = N*B; if
+            # N*B > pares_dia the pipeline is infeasible, so each buffer is
+            # capped at pares_dia * 0.4 / N.
             # This ensures the pipeline has enough overlap to complete.
             if effective_buffer > 0 and pares_dia_m > 0:
-                n_rules = prec_count_per_model.get(str(modelo_code), 1)
+                n_rules = compiled.precedence_count(modelo_code) or 1
                 max_total_startup = max(1, int(pares_dia_m * 0.4))
                 max_per_rule = max(1, max_total_startup // max(1, n_rules))
                 if effective_buffer > max_per_rule:
@@ -365,44 +533,77 @@ def schedule_day(models_day: list, params: dict, compiled=None,
                 print(f"    [PREC] skip: idx_orig o idx_dest vacio")
                 continue
 
-            for op_o in idx_orig:
-                for op_d in idx_dest:
-                    print(f"      [PREC] op{op_o}->op{op_d}, eff_buffer={effective_buffer}")
-                    if effective_buffer == 0:
-                        # Buffer=0 -> conveyor: unidirectional flow
-                        # Destination NEVER produces more than origin
-                        # Origin at most ~1 block ahead (tight coupling)
-                        rate_o = models_day[target_m]["operations"][op_o]["rate"]
-                        rate_d = models_day[target_m]["operations"][op_d]["rate"]
-                        block_min = max(tb["minutes"] for tb in time_blocks)
-                        max_lead = max(int(rate_o * block_min / 60),
-                                       int(rate_d * block_min / 60))
-                        for b in range(num_blocks):
-                            cum_orig = sum(x[target_m, op_o, bb]
-                                           for bb in range(b + 1))
-                            cum_dest = sum(x[target_m, op_d, bb]
-                                           for bb in range(b + 1))
-                            # Destination NEVER ahead of origin
-                            solver_model.Add(cum_dest <= cum_orig)
-                            # Origin at most max_lead ahead (tight coupling)
-                            solver_model.Add(cum_orig <= cum_dest + max_lead)
-                    else:
-                        # Buffer>0 -> startup delay: destination can't produce
-                        # until origin has accumulated buffer pares, then free.
-                        for b in range(num_blocks):
-                            cum_orig = sum(x[target_m, op_o, bb] for bb in range(b + 1))
-                            cum_dest = sum(x[target_m, op_d, bb] for bb in range(b + 1))
-                            # Destination never produces more than origin
-                            solver_model.Add(cum_dest <= cum_orig)
-                            # Startup delay: dest blocked until origin >= buffer
-                            buf_ok = solver_model.NewBoolVar(
-                                f"buf_{target_m}_{op_o}_{op_d}_{b}")
-                            solver_model.Add(
-                                cum_orig >= effective_buffer).OnlyEnforceIf(buf_ok)
-                            solver_model.Add(
-                                cum_orig <= effective_buffer - 1).OnlyEnforceIf(buf_ok.Not())
+            for op_idx in idx_orig + idx_dest:
+                if (target_m, op_idx) not in cum:
+                    cum[target_m, op_idx] = _prefix_sums(
+                        solver_model, x, target_m, op_idx, num_blocks, real_blocks,
+                        pares_dia_m + max_over[target_m], zero)
+
+            # Todas las origen vs todas las destino por bloque: en vez de una
+            # cadena por par (k*j), se comparan min(cum origen) y max(cum
+            # destino) (k + j + 1 filas por bloque; con un solo op no hay
+            # variable extra).
+            cum_ub = pares_dia_m + max_over[target_m]
+            orig_min = {}
+            dest_max = {}
+            for b in real_blocks:
+                orig_min[b] = _aggregate_cum(
+                    solver_model, [cum[target_m, op][b] for op in idx_orig],
+                    cum_ub, "min", f"pomin_{target_m}_{prec_idx}_{b}")
+                dest_max[b] = _aggregate_cum(
+                    solver_model, [cum[target_m, op][b] for op in idx_dest],
+                    cum_ub, "max", f"pdmax_{target_m}_{prec_idx}_{b}")
+                # Destination NEVER ahead of any origin
+                solver_model.Add(dest_max[b] <= orig_min[b])
+
+            if effective_buffer == 0:
+                # Buffer=0 -> conveyor: unidirectional flow
+                # Origin at most ~1 block ahead of each destination (tight
+                # coupling). max_lead depende del par (rates), asi que si no es
+                # uniforme se conserva una fila por par.
+                block_min = max(blk_min)
+                ops_m = models_day[target_m]["operations"]
+                lead = {
+                    (op_o, op_d): max(int(ops_m[op_o]["rate"] * block_min / 60),
+                                      int(ops_m[op_d]["rate"] * block_min / 60))
+                    for op_o in idx_orig for op_d in idx_dest
+                }
+                leads = set(lead.values())
+                print(f"      [PREC] conveyor op{idx_orig}->op{idx_dest}, max_lead={sorted(leads)}")
+                if len(leads) == 1:
+                    max_lead = leads.pop()
+                    orig_max = {
+                        b: _aggregate_cum(
+                            solver_model, [cum[target_m, op][b] for op in idx_orig],
+                            cum_ub, "max", f"pomax_{target_m}_{prec_idx}_{b}")
+                        for b in real_blocks
+                    }
+                    dest_min = {
+                        b: _aggregate_cum(
+                            solver_model, [cum[target_m, op][b] for op in idx_dest],
+                            cum_ub, "min", f"pdmin_{target_m}_{prec_idx}_{b}")
+                        for b in real_blocks
+                    }
+                    for b in real_blocks:
+                        solver_model.Add(orig_max[b] <= dest_min[b] + max_lead)
+                else:
+                    for (op_o, op_d), max_lead in lead.items():
+                        for b in real_blocks:
                             solver_model.Add(
-                                x[target_m, op_d, b] == 0).OnlyEnforceIf(buf_ok.Not())
+                                cum[target_m, op_o][b] <= cum[target_m, op_d][b] + max_lead)
+            else:
+                # Buffer>0 -> startup delay: destinations can't produce until
+                # every origin has accumulated buffer pares, then free.
+                print(f"      [PREC] startup op{idx_orig}->op{idx_dest}, eff_buffer={effective_buffer}")
+                for b in real_blocks:
+                    buf_ok = solver_model.NewBoolVar(f"buf_{target_m}_{prec_idx}_{b}")
+                    solver_model.Add(
+                        orig_min[b] >= effective_buffer).OnlyEnforceIf(buf_ok)
+                    solver_model.Add(
+                        orig_min[b] <= effective_buffer - 1).OnlyEnforceIf(buf_ok.Not())
+                    for op_d in idx_dest:
+                        solver_model.Add(
+                            x[target_m, op_d, b] == 0).OnlyEnforceIf(buf_ok.Not())
 
     # --- Cascada implicita entre operaciones consecutivas ---
     # Cada operacion debe llevar ventaja acumulativa sobre la siguiente.
@@ -413,29 +614,31 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     custom_prec_edges = set()  # (m_idx, op_idx_from, op_idx_to) — custom precedence pairs
     if compiled and compiled.precedences:
         for (modelo_code, fracs_orig, fracs_dest, _buf) in compiled.precedences:
-            for m_idx, model in enumerate(models_day):
-                code = model.get("codigo", "")
-                if code == str(modelo_code) or code.startswith(str(modelo_code)):
-                    # If custom says later_frac -> earlier_frac, cascade conflicts
-                    for fo in fracs_orig:
-                        for fd in fracs_dest:
-                            oi = frac_to_op.get((m_idx, fo))
-                            od = frac_to_op.get((m_idx, fd))
-                            if oi is not None and od is not None and oi > od:
-                                # Custom goes backwards (later -> earlier): skip all cascade
-                                # between od and oi (inclusive range)
-                                for skip_idx in range(od, oi):
-                                    custom_prec_edges.add((m_idx, skip_idx))
-                                    print(f"    [CASCADE] skip cascade {code} op{skip_idx}->op{skip_idx+1} (conflicts with F{fo}->F{fd})")
+            for m_idx in models_by_prefix.get(str(modelo_code), []):
+                code = models_day[m_idx].get("codigo", "")
+                # If custom says later_frac -> earlier_frac, cascade conflicts
+                for fo in fracs_orig:
+                    for fd in fracs_dest:
+                        oi = frac_to_op.get((m_idx, fo))
+                        od = frac_to_op.get((m_idx, fd))
+                        if oi is not None and od is not None and oi > od:
+                            # Custom goes backwards (later -> earlier): skip all cascade
+                            # between od and oi (inclusive range)
+                            for skip_idx in range(od, oi):
+                                custom_prec_edges.add((m_idx, skip_idx))
+                                print(f"    [CASCADE] skip cascade {code} op{skip_idx}->op{skip_idx+1} (conflicts with F{fo}->F{fd})")
 
     for m_idx, model in enumerate(models_day):
         ops = model["operations"]
         for op_idx in range(len(ops) - 1):
             if (m_idx, op_idx) in custom_prec_edges:
                 continue  # skip: custom precedence conflicts with linear cascade here
-            for b in range(num_blocks):
-                cum_current = sum(x[m_idx, op_idx, bb] for bb in range(b + 1))
-                cum_next = sum(x[m_idx, op_idx + 1, bb] for bb in range(b + 1))
+            # Sumas de prefijo directas (O(B^2) terminos): sin IntVar auxiliares
+            # que debiliten la relajacion y la reparacion del hint.
+            for rb_idx in range(len(real_blocks)):
+                prefix = real_blocks[:rb_idx + 1]
+                cum_current = cp_model.LinearExpr.Sum([x[m_idx, op_idx, bb] for bb in prefix])
+                cum_next = cp_model.LinearExpr.Sum([x[m_idx, op_idx + 1, bb] for bb in prefix])
                 # Operacion actual siempre debe haber producido >= la siguiente
                 solver_model.Add(cum_current >= cum_next)
 
@@ -447,123 +650,97 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     overproduction = {}
     for m_idx, model in enumerate(models_day):
         pares_dia = model["pares_dia"]
-        # Max overproduction: limitada a 15% del pares_dia (solo para redondeo de bloques)
-        rate_max = max(
-            int(op["rate"] * op.get("max_hc", 1))
-            for op in model["operations"]
-        ) if model["operations"] else 0
-        max_over = min(rate_max, max(10, int(pares_dia * 0.15)))
         overproduction[m_idx] = solver_model.NewIntVar(
-            0, max_over, f"over_{m_idx}"
+            0, max_over[m_idx], f"over_{m_idx}"
         )
         for op_idx in range(len(model["operations"])):
-            total_op = sum(x[m_idx, op_idx, b] for b in range(num_blocks))
+            total_op = cp_model.LinearExpr.Sum([x[m_idx, op_idx, b] for b in real_blocks])
             # Per-op completion: each op can complete independently
             # Cascade ensures earlier ops produce >= later ops
             solver_model.Add(
                 total_op + op_tardiness[m_idx, op_idx] == pares_dia + overproduction[m_idx]
             )
 
-    # 2. Linking x, active, hc_used + limite por rate
-    #    Para operaciones manuales: x = rate * hc_used (exacto, multiples del rate).
-    #    Para robots: hc_used=1 siempre, x <= rate (1 persona por robot).
+    # 2. Linking x, active, hc_used (semi-reificado, sin big-M)
+    #    El limite por rate (robots: x <= rate; manuales: x <= rate * max_hc)
+    #    ya esta en el dominio de x / y.
+    #    Inactivo: x + hc_used == 0 (una fila: ambas son >= 0).
+    #    Activo: hc_used >= 1; en robots ademas x >= 1 (en manuales ya lo
+    #    fuerza x = rate * hc_used de la seccion 7).
     for m_idx, model in enumerate(models_day):
-        pares_dia = model["pares_dia"]
-        for op_idx, op in enumerate(model["operations"]):
-            robots = op.get("robots", [])
-            has_robots = len(robots) > 0
-            for b in range(num_blocks):
-                # Linking hc_used <-> active
-                solver_model.Add(
-                    hc_used[m_idx, op_idx, b] >= 1
-                ).OnlyEnforceIf(active[m_idx, op_idx, b])
-                solver_model.Add(
-                    hc_used[m_idx, op_idx, b] == 0
-                ).OnlyEnforceIf(active[m_idx, op_idx, b].Not())
-                # x = 0 cuando inactivo
+        for op_idx in range(len(model["operations"])):
+            is_robot = bool(op_robots[m_idx][op_idx])
+            for b in real_blocks:
+                if x_ub[m_idx, op_idx, b] == 0:
+                    continue  # active/hc_used/x son 0 por dominio
+                act = active[m_idx, op_idx, b]
                 solver_model.Add(
-                    x[m_idx, op_idx, b] == 0
-                ).OnlyEnforceIf(active[m_idx, op_idx, b].Not())
-
-                block_min = time_blocks[b]["minutes"]
-                max_pares_1person = int(op["rate"] * block_min / 60)
-
-                if has_robots:
-                    # Robots: hc_used=1, x <= rate (1 persona por robot)
-                    if max_pares_1person < pares_dia:
-                        solver_model.Add(x[m_idx, op_idx, b] <= max_pares_1person)
-                    for r in robots:
-                        if max_pares_1person < pares_dia:
-                            solver_model.Add(y[m_idx, op_idx, r, b] <= max_pares_1person)
-                else:
-                    # Operaciones manuales: x <= rate * max_hc (upper bound)
-                    max_hc = op.get("max_hc", 1)
-                    max_pares_block = max_pares_1person * max_hc
-                    if max_pares_block < pares_dia:
-                        solver_model.Add(x[m_idx, op_idx, b] <= max_pares_block)
+                    x[m_idx, op_idx, b] + hc_used[m_idx, op_idx, b] == 0
+                ).OnlyEnforceIf(act.Not())
+                solver_model.Add(hc_used[m_idx, op_idx, b] >= 1).OnlyEnforceIf(act)
+                if is_robot:
+                    solver_model.Add(x[m_idx, op_idx, b] >= 1).OnlyEnforceIf(act)
 
     # 2b. Linking y con x para operaciones con robots
     #     sum_r y[m, op, r, b] = x[m, op, b]
     for m_idx, op_idx in robot_ops_idx:
-        op = models_day[m_idx]["operations"][op_idx]
-        robots = op["robots"]
-        for b in range(num_blocks):
+        robots = op_robots[m_idx][op_idx]
+        for b in real_blocks:
             solver_model.Add(
-                sum(y[m_idx, op_idx, r, b] for r in robots) == x[m_idx, op_idx, b]
+                cp_model.LinearExpr.Sum([y[m_idx, op_idx, r, b] for r in robots])
+                == x[m_idx, op_idx, b]
             )
 
     # 3. Capacidad de recurso por bloque (recursos NO-robot) - SOFT
     #    Permite exceder capacidad con penalty alto en vez de INFEASIBLE.
+    #    Coeficientes (sec_per_pair) por recurso: iguales en todos los bloques
+    recurso_secs = {recurso: [op_sec[m_idx][op_idx] for m_idx, op_idx in ops_r]
+                    for recurso, ops_r in manual_ops_by_recurso.items()}
     hc_overflow_terms = []
-    for b in range(num_blocks):
-        block_minutes = time_blocks[b]["minutes"]
-        block_sec = block_minutes * 60
-        if block_sec == 0:
-            continue
-
-        # Agrupar carga por tipo de recurso (excluir ops con robots asignados)
-        resource_loads = {}
-        for m_idx, model in enumerate(models_day):
-            for op_idx, op in enumerate(model["operations"]):
-                robots = op.get("robots", [])
-                if robots:
-                    continue
-                recurso = op["recurso"]
-                if recurso not in resource_loads:
-                    resource_loads[recurso] = []
-                resource_loads[recurso].append(
-                    x[m_idx, op_idx, b] * op["sec_per_pair"]
-                )
-
-        for recurso, loads in resource_loads.items():
-            # MESA y GENERAL son trabajo manual — capacidad = plantilla, no maquinas
-            if recurso in ("MESA", "GENERAL"):
-                cap = plantilla
-            else:
-                cap = resource_cap.get(recurso, resource_cap.get("GENERAL", 4))
-            max_capacity_sec = cap * block_sec
+    for b in real_blocks:
+        block_sec = blk_sec[b]
+
+        # Carga por tipo de recurso (excluye ops con robots asignados) y su
+        # cota superior (sum x_ub * sec_per_pair) para acotar el overflow;
+        # la lista de variables solo se arma si la fila no es redundante
+        for recurso, ops_r in manual_ops_by_recurso.items():
+            load_secs = recurso_secs[recurso]
+            demand_ub = sum(x_ub[m_idx, op_idx, b] * sec
+                            for (m_idx, op_idx), sec in zip(ops_r, load_secs))
+            max_capacity_sec = recurso_cap[recurso] * block_sec
+            overflow_ub = min(max_capacity_sec, demand_ub - max_capacity_sec)
+            if overflow_ub <= 0:
+                continue  # la carga maxima posible cabe: fila redundante
+            load_vars = [x[m_idx, op_idx, b] for m_idx, op_idx in ops_r]
             overflow = solver_model.NewIntVar(
-                0, max_capacity_sec, f"rcap_{recurso}_{b}"
+                0, overflow_ub, f"rcap_{recurso}_{b}"
+            )
+            solver_model.Add(
+                cp_model.LinearExpr.WeightedSum(load_vars, load_secs)
+                <= max_capacity_sec + overflow
             )
-            solver_model.Add(sum(loads) <= max_capacity_sec + overflow)
             hc_overflow_terms.append(overflow)
 
     # 4. Headcount total por bloque <= plantilla - SOFT
     #    Permite exceder plantilla con penalty alto en vez de INFEASIBLE.
-    for b in range(num_blocks):
-        block_sec = time_blocks[b]["minutes"] * 60
-        if block_sec == 0:
-            continue
-        total_load = []
-        for m_idx, model in enumerate(models_day):
-            for op_idx, op in enumerate(model["operations"]):
-                total_load.append(x[m_idx, op_idx, b] * op["sec_per_pair"])
-        if total_load:
-            max_hc_sec = plantilla * block_sec
+    #    block_load[b] = carga total del bloque en segundos, materializada una
+    #    vez y reutilizada aqui y en la penalizacion de ociosos (seccion 9).
+    block_load = {}
+    for b in real_blocks:
+        block_sec = blk_sec[b]
+        load_vars = [x[m_idx, op_idx, b] for m_idx, op_idx in all_ops]
+        demand_ub = sum(x_ub[m_idx, op_idx, b] * sec
+                        for (m_idx, op_idx), sec in zip(all_ops, all_ops_sec))
+        block_load[b] = solver_model.NewIntVar(0, demand_ub, f"load_{b}")
+        solver_model.Add(
+            block_load[b] == cp_model.LinearExpr.WeightedSum(load_vars, all_ops_sec)
+        )
+        max_hc_sec = plantilla * block_sec
+        if load_vars and demand_ub > max_hc_sec:
             overflow = solver_model.NewIntVar(
-                0, max_hc_sec, f"hcov_{b}"
+                0, min(max_hc_sec, demand_ub - max_hc_sec), f"hcov_{b}"
             )
-            solver_model.Add(sum(total_load) <= max_hc_sec + overflow)
+            solver_model.Add(block_load[b] <= max_hc_sec + overflow)
             hc_overflow_terms.append(overflow)
 
     # 4b. Capacidad de operarios por recurso por bloque - SEMI-HARD
@@ -572,26 +749,16 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     op_capacity = params.get("operator_capacity", {})
     op_cap_overflow_terms = []
     if op_capacity:
-        for b in range(num_blocks):
-            # Group hc_used by recurso
-            hc_by_recurso = {}  # {recurso: [hc_used vars]}
-            for m_idx, model in enumerate(models_day):
-                for op_idx, op in enumerate(model["operations"]):
-                    if bool(op.get("robots", [])):
-                        continue  # robots have dedicated operators, skip
-                    recurso = op["recurso"]
-                    # For compound resources like "PLANA,POSTE", count toward each part
-                    parts = [p.strip() for p in recurso.split(",")] if "," in recurso else [recurso]
-                    for part in parts:
-                        if part not in hc_by_recurso:
-                            hc_by_recurso[part] = []
-                        hc_by_recurso[part].append(hc_used[m_idx, op_idx, b])
+        for b in real_blocks:
             # SEMI-HARD: max 1 extra operario con penalty alto
-            for recurso, hc_vars in hc_by_recurso.items():
+            # (robots have dedicated operators, skip; compound resources
+            # count toward each part)
+            for recurso, ops_r in manual_ops_by_part.items():
+                hc_vars = [hc_used[m_idx, op_idx, b] for m_idx, op_idx in ops_r]
                 cap = op_capacity.get(recurso)
                 if cap is not None and hc_vars:
                     overflow = solver_model.NewIntVar(0, 1, f"opcap_{recurso}_{b}")
-                    solver_model.Add(sum(hc_vars) <= cap + overflow)
+                    solver_model.Add(cp_model.LinearExpr.Sum(hc_vars) <= cap + overflow)
                     op_cap_overflow_terms.append(overflow)
 
     # 5. Capacidad de robot individual por bloque
@@ -599,101 +766,140 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     #    robot_active[m, op, r, b] = 1 si robot r esta asignado a (m, op) en bloque b
     #    Para cada robot r y bloque b: sum_{m,op} robot_active <= 1  (exclusividad)
     #    Linking: y[m,op,r,b] > 0 => robot_active = 1
-    all_robots_in_day = set()
+    #    ops_of_robot: robot -> [(m, op)] que lo pueden usar (orden de robot_ops_idx)
+    ops_of_robot = {}
     for m_idx, op_idx in robot_ops_idx:
-        op = models_day[m_idx]["operations"][op_idx]
-        for r in op["robots"]:
-            all_robots_in_day.add(r)
+        for r in op_robots[m_idx][op_idx]:
+            ops_of_robot.setdefault(r, []).append((m_idx, op_idx))
 
     robot_active = {}
     for m_idx, op_idx in robot_ops_idx:
-        op = models_day[m_idx]["operations"][op_idx]
-        pares_dia = models_day[m_idx]["pares_dia"]
-        for r in op["robots"]:
-            for b in range(num_blocks):
+        for r in op_robots[m_idx][op_idx]:
+            for b in real_blocks:
+                if y[m_idx, op_idx, r, b] is zero:
+                    robot_active[m_idx, op_idx, r, b] = zero
+                    continue
                 ra = solver_model.NewBoolVar(f"ra_{m_idx}_{op_idx}_{r}_{b}")
                 robot_active[m_idx, op_idx, r, b] = ra
-                # Linking: y > 0 => ra = 1, ra = 0 => y = 0
-                solver_model.Add(y[m_idx, op_idx, r, b] <= pares_dia * ra)
-                solver_model.Add(y[m_idx, op_idx, r, b] >= ra)  # ra=1 => y>=1
+                # Linking (sin big-M): ra = 0 => y = 0, ra = 1 => y >= 1
+                solver_model.Add(y[m_idx, op_idx, r, b] == 0).OnlyEnforceIf(ra.Not())
+                solver_model.Add(y[m_idx, op_idx, r, b] >= 1).OnlyEnforceIf(ra)
 
     # Exclusividad: cada robot puede estar en max 1 operacion por bloque
     robot_constraint_count = 0
-    for b in range(num_blocks):
-        for robot in all_robots_in_day:
+    for b in real_blocks:
+        for robot, ops_r in ops_of_robot.items():
             uses = []
             use_labels = []
-            for m_idx, op_idx in robot_ops_idx:
-                op = models_day[m_idx]["operations"][op_idx]
-                if robot in op["robots"]:
-                    uses.append(robot_active[m_idx, op_idx, robot, b])
-                    use_labels.append(f"{models_day[m_idx]['codigo']}:F{op['fraccion']}")
+            for m_idx, op_idx in ops_r:
+                if robot_active[m_idx, op_idx, robot, b] is zero:
+                    continue  # robot no disponible para la op en b
+                uses.append(robot_active[m_idx, op_idx, robot, b])
+                if b == 0:
+                    frac = models_day[m_idx]["operations"][op_idx]["fraccion"]
+                    use_labels.append(f"{models_day[m_idx]['codigo']}:F{frac}")
             if len(uses) > 1:
-                solver_model.Add(sum(uses) <= 1)
+                solver_model.AddAtMostOne(uses)
                 robot_constraint_count += 1
                 if b == 0:  # Log once per robot
                     print(f"    [ROBOT EXCL] {robot}: {len(uses)} ops compiten -> {use_labels}")
     print(f"    [ROBOT EXCL] Total constraints: {robot_constraint_count}")
 
-    # Capacidad de rate por robot por bloque (1 persona por robot)
-    for b in range(num_blocks):
-        block_sec = time_blocks[b]["minutes"] * 60
-        for robot in all_robots_in_day:
-            for m_idx, op_idx in robot_ops_idx:
-                op = models_day[m_idx]["operations"][op_idx]
-                if robot in op["robots"]:
-                    solver_model.Add(
-                        y[m_idx, op_idx, robot, b] * op["sec_per_pair"] <= block_sec
-                    )
-
     # 5b. Robots reservados por schedule principal (para adelantos)
     #     Si un robot ya esta en uso en un bloque, ninguna operacion puede usarlo.
     if reserved_robots:
         for robot, blocked_set in reserved_robots.items():
-            if robot not in all_robots_in_day:
-                continue
             for b in blocked_set:
                 if b >= num_blocks:
                     continue
-                for m_idx, op_idx in robot_ops_idx:
-                    op = models_day[m_idx]["operations"][op_idx]
-                    if robot in op["robots"]:
-                        key = (m_idx, op_idx, robot, b)
-                        if key in robot_active:
-                            solver_model.Add(robot_active[key] == 0)
-
-    # Bloques productivos (excluir bloques con 0 minutos, e.g. COMIDA)
-    real_blocks = [b for b in range(num_blocks) if time_blocks[b]["minutes"] > 0]
-
-    # Forzar x=0 y active=0 en bloques no productivos (COMIDA)
-    for b in range(num_blocks):
-        if time_blocks[b]["minutes"] == 0:
-            for m_idx, model in enumerate(models_day):
-                for op_idx in range(len(model["operations"])):
-                    solver_model.Add(x[m_idx, op_idx, b] == 0)
-                    solver_model.Add(active[m_idx, op_idx, b] == 0)
+                for m_idx, op_idx in ops_of_robot.get(robot, ()):
+                    key = (m_idx, op_idx, robot, b)
+                    if key in robot_active:
+                        solver_model.Add(robot_active[key] == 0)
+
+    # 5c. Ruptura de simetria entre robots intercambiables: mismos (m, op)
+    #     elegibles y mismos bloques deshabilitados/reservados. Dentro de un
+    #     bloque se pueden permutar sin cambiar nada mas, asi que en la primera
+    #     operacion que los usa se ordena y[r1] >= y[r2] >= ... (orden de su
+    #     lista de robots) y la operacion toma primero al robot de la cabeza.
+    robot_groups = {}
+    for r, ops_r in ops_of_robot.items():
+        blocked = frozenset(disabled_by_robot.get(r, ()))
+        if reserved_robots:
+            blocked |= frozenset(reserved_robots.get(r, ()))
+        robot_groups.setdefault((tuple(ops_r), blocked), []).append(r)
+    for (ops_r, _blocked), group in robot_groups.items():
+        if len(group) < 2:
+            continue
+        m_idx, op_idx = ops_r[0]
+        order = [r for r in op_robots[m_idx][op_idx] if r in group]
+        for b in real_blocks:
+            for r_a, r_b in zip(order, order[1:]):
+                if y[m_idx, op_idx, r_b, b] is zero:
+                    continue
+                solver_model.Add(y[m_idx, op_idx, r_a, b] >= y[m_idx, op_idx, r_b, b])
 
     # 6. Contiguidad de operaciones (salta bloques no productivos):
     #    Una vez detenida, no puede reiniciar. COMIDA no rompe contiguidad.
+    #    Cadena booleana stopped[b] (solo clausulas, sin filas lineales):
+    #      active[b-1] y no active[b]  => stopped[b]
+    #      stopped[b-1]                => stopped[b]
+    #      stopped[b]                  => no active[b]
+    #    Se prefiere a un intervalo start/end reificado. Una variante first/last
+    #    block no ahorra nada: la equivalencia active <=> first<=b<=last
+    #    pide dos Booleanos reificados por bloque contra el unico stopped.
     for m_idx, model in enumerate(models_day):
         for op_idx in range(len(model["operations"])):
-            stopped = {}
-            for rb_idx, b in enumerate(real_blocks):
-                stopped[b] = solver_model.NewBoolVar(
-                    f"stop_{m_idx}_{op_idx}_{b}"
-                )
-            solver_model.Add(stopped[real_blocks[0]] == 0)
+            if all(x_ub[m_idx, op_idx, b] == 0 for b in real_blocks):
+                continue  # nunca activa: nada que encadenar
+            prev_stopped = None
             for rb_idx in range(1, len(real_blocks)):
                 b = real_blocks[rb_idx]
                 prev_b = real_blocks[rb_idx - 1]
-                solver_model.Add(
-                    stopped[b] >= active[m_idx, op_idx, prev_b]
-                    - active[m_idx, op_idx, b]
-                )
-                solver_model.Add(stopped[b] >= stopped[prev_b])
-                solver_model.Add(
-                    active[m_idx, op_idx, b] + stopped[prev_b] <= 1
-                )
+                stopped = solver_model.NewBoolVar(f"stop_{m_idx}_{op_idx}_{b}")
+                solver_model.AddBoolOr([
+                    active[m_idx, op_idx, prev_b].Not(),
+                    active[m_idx, op_idx, b],
+                    stopped,
+                ])
+                if prev_stopped is not None:
+                    solver_model.AddImplication(prev_stopped, stopped)
+                solver_model.AddBoolOr([stopped.Not(), active[m_idx, op_idx, b].Not()])
+                prev_stopped = stopped
+
+    # 6b. Ruptura de simetria entre modelos intercambiables: mismas operaciones
+    #     (fraccion, rate, recurso, robots, HC), mismos pares, mismos topes por
+    #     bloque y misma posicion de split (ej. "60000 NG" y "60000 NE" con el
+    #     mismo catalogo). Intercambiarlos no cambia el objetivo, asi que se
+    #     ordena la produccion de la primera operacion en su primer bloque.
+    #     Los modelos con precedencias quedan fuera (la regla aplica al primero).
+    prec_models = set()
+    if compiled and compiled.precedences:
+        for (modelo_code, _fo, _fd, _buf) in compiled.precedences:
+            prec_models.update(models_by_prefix.get(str(modelo_code), []))
+    twins = {}
+    for m_idx, model in enumerate(models_day):
+        if m_idx in prec_models or not model["operations"]:
+            continue
+        tmpl_key = (
+            model["pares_dia"], model.get("split_position"),
+            tuple((op["fraccion"], op["rate"], op["sec_per_pair"], op["recurso"],
+                   tuple(op_robots[m_idx][op_idx]), op_hc[m_idx][op_idx],
+                   op.get("input_o_proceso", ""))
+                  for op_idx, op in enumerate(model["operations"])),
+            tuple(x_ub[m_idx, op_idx, b]
+                  for op_idx in range(len(model["operations"]))
+                  for b in real_blocks),
+        )
+        twins.setdefault(tmpl_key, []).append(m_idx)
+    for group in twins.values():
+        first_b = next((b for b in real_blocks if x_ub[group[0], 0, b] > 0), None)
+        if len(group) < 2 or first_b is None:
+            continue
+        for m_a, m_b in zip(group, group[1:]):
+            solver_model.Add(x[m_a, 0, first_b] >= x[m_b, 0, first_b])
+        print(f"    [SIMETRIA] modelos intercambiables: "
+              f"{[models_day[m]['codigo'] for m in group]}")
 
     # 7. Produccion por multiplos exactos del rate (salta COMIDA):
     #    Cada persona produce exactamente rate pares/bloque (ej: 100).
@@ -703,16 +909,15 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     #    Robots: hc_used=1 siempre, x <= rate_pb (ya limitado en seccion 2).
     step_penalty_vars = []
     for m_idx, model in enumerate(models_day):
-        for op_idx, op in enumerate(model["operations"]):
-            is_robot = bool(op.get("robots", []))
-            if is_robot:
+        for op_idx in range(len(model["operations"])):
+            rates = rate_pb_of[m_idx][op_idx]
+            if op_robots[m_idx][op_idx]:
                 # Robots ya limitados: hc_used=1, x<=rate. Solo forzar uniformidad
                 # para bloques no-ultimo: x >= rate cuando ambos activos.
                 for rb_idx in range(len(real_blocks) - 1):
                     b = real_blocks[rb_idx]
                     next_b = real_blocks[rb_idx + 1]
-                    block_min = time_blocks[b]["minutes"]
-                    rate_pb = int(op["rate"] * block_min / 60)
+                    rate_pb = rates[b]
                     if rate_pb <= 0:
                         continue
                     solver_model.Add(
@@ -726,10 +931,9 @@ def schedule_day(models_day: list, params: dict, compiled=None,
             # --- Operaciones manuales: x = rate * hc_used ---
             for rb_idx in range(len(real_blocks)):
                 b = real_blocks[rb_idx]
-                block_min = time_blocks[b]["minutes"]
-                rate_pb = int(op["rate"] * block_min / 60)
+                rate_pb = rates[b]
                 step_pb = min(step, rate_pb) if rate_pb > 0 else 0
-                if rate_pb <= 0:
+                if rate_pb <= 0 or x_ub[m_idx, op_idx, b] == 0:
                     continue
 
                 # Determinar si es ultimo bloque activo
@@ -781,22 +985,22 @@ def schedule_day(models_day: list, params: dict, compiled=None,
         if post_ops_by_model:
             post_model_active = {}
             for m_idx, post_op_idxs in post_ops_by_model.items():
-                for b in range(num_blocks):
+                for b in real_blocks:
                     pma = solver_model.NewBoolVar(f"pma_{m_idx}_{b}")
                     post_model_active[m_idx, b] = pma
                     # pma = OR(active[m, op, b] para cada op POST)
                     for op_idx in post_op_idxs:
                         solver_model.Add(pma >= active[m_idx, op_idx, b])
                     solver_model.Add(
-                        pma <= sum(active[m_idx, op_idx, b]
-                                   for op_idx in post_op_idxs)
+                        pma <= cp_model.LinearExpr.Sum(
+                            [active[m_idx, op_idx, b] for op_idx in post_op_idxs])
                     )
 
             models_with_post = list(post_ops_by_model.keys())
-            for b in range(num_blocks):
+            for b in real_blocks:
                 solver_model.Add(
-                    sum(post_model_active[m_idx, b]
-                        for m_idx in models_with_post)
+                    cp_model.LinearExpr.Sum(
+                        [post_model_active[m_idx, b] for m_idx in models_with_post])
                     <= lineas_post
                 )
             print(f"    [POST] Conveyor exclusivity: {len(models_with_post)} modelos POST, "
@@ -805,44 +1009,46 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     # 9. Penalizar operarios ociosos: incentiva usar toda la plantilla
     idle_terms = []
     for b in real_blocks:
-        block_sec = time_blocks[b]["minutes"] * 60
-        total_load = []
-        for m_idx, model in enumerate(models_day):
-            for op_idx, op in enumerate(model["operations"]):
-                total_load.append(x[m_idx, op_idx, b] * op["sec_per_pair"])
-        target_sec = plantilla * block_sec
+        target_sec = plantilla * blk_sec[b]
         idle = solver_model.NewIntVar(0, target_sec, f"idle_{b}")
-        solver_model.Add(idle >= target_sec - sum(total_load))
+        solver_model.Add(idle >= target_sec - block_load[b])
         idle_terms.append(idle)
 
     # --- Funcion Objetivo ---
-    obj_terms = []
+    # Objetivo lineal como (variables, pesos): un solo WeightedSum al final
+    obj_vars = []
+    obj_w = []
 
     # Minimizar tardiness
     for m_idx in range(len(models_day)):
-        obj_terms.append(W_TARDINESS * tardiness[m_idx])
+        obj_vars.append(tardiness[m_idx])
+        obj_w.append(W_TARDINESS)
 
     # (Uniformidad ahora es HARD constraint, no necesita penalizacion suave)
 
     # Penalty por exceder capacidad de recurso o plantilla por bloque
     for ov in hc_overflow_terms:
-        obj_terms.append(W_HC_OVERFLOW * ov)
+        obj_vars.append(ov)
+        obj_w.append(W_HC_OVERFLOW)
 
     # Penalty por exceder capacidad de operarios por recurso (semi-hard)
     # Peso alto: 1 overflow por 1 bloque = 200k (equivale a 2 pares de tardiness)
     W_OP_CAP = 200_000
     for ov in op_cap_overflow_terms:
-        obj_terms.append(W_OP_CAP * ov)
+        obj_vars.append(ov)
+        obj_w.append(W_OP_CAP)
 
     # Penalty por operarios ociosos (incentiva usar toda la plantilla)
     for idle in idle_terms:
-        obj_terms.append(W_IDLE * idle)
+        obj_vars.append(idle)
+        obj_w.append(W_IDLE)
 
     # Penalizar sobreproduccion (leve: preferir completar bloques al rate,
     # pero no sobreproducir mas de lo necesario para llenar el ultimo bloque)
     W_OVER = 5  # mucho menor que tardiness para preferir sobreproducir a no completar
     for m_idx in range(len(models_day)):
-        obj_terms.append(W_OVER * overproduction[m_idx])
+        obj_vars.append(overproduction[m_idx])
+        obj_w.append(W_OVER)
 
     # Penalizar uso de step (50 pares) en lugar de rate (100 pares) en ultimo bloque.
     # Preferir bloques completos al rate; step solo como fallback.
@@ -853,7 +1059,8 @@ def schedule_day(models_day: list, params: dict, compiled=None,
         solver_model.Add(uses_step <= is_last_var)
         solver_model.Add(uses_step <= 1 - is_full_var)
         solver_model.Add(uses_step >= is_last_var + (1 - is_full_var) - 1)
-        obj_terms.append(W_STEP_PENALTY * uses_step)
+        obj_vars.append(uses_step)
+        obj_w.append(W_STEP_PENALTY)
 
     # Early/Late completion: controlar posicion horaria de modelos.
     # - Modelos normales y split_head: preferir bloques tempranos (W_EARLY * b)
@@ -864,13 +1071,17 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     for m_idx, model in enumerate(models_day):
         split_pos = model.get("split_position")
         for op_idx, op in enumerate(model["operations"]):
-            for b in range(num_blocks):
+            for b in real_blocks:
+                if x_ub[m_idx, op_idx, b] == 0:
+                    continue
                 if split_pos == "tail":
                     # Invertir: preferir bloques tardios (penalizar bloques tempranos)
-                    obj_terms.append(W_LATE * x[m_idx, op_idx, b] * (num_blocks - 1 - b))
+                    obj_vars.append(x[m_idx, op_idx, b])
+                    obj_w.append(W_LATE * (num_blocks - 1 - b))
                 else:
                     # Normal: preferir bloques tempranos
-                    obj_terms.append(W_EARLY * x[m_idx, op_idx, b] * b)
+                    obj_vars.append(x[m_idx, op_idx, b])
+                    obj_w.append(W_EARLY * b)
 
     # Desbalance de HC entre bloques: penalizar la diferencia entre el bloque
     # con mas HC y el bloque con menos HC. Esto incentiva distribuir el trabajo
@@ -880,19 +1091,71 @@ def schedule_day(models_day: list, params: dict, compiled=None,
         block_hc_vars = []
         for b in real_blocks:
             hc_b = solver_model.NewIntVar(0, plantilla * 10, f"bhc_{b}")
-            block_load = []
-            for m_idx, model in enumerate(models_day):
-                for op_idx in range(len(model["operations"])):
-                    block_load.append(hc_used[m_idx, op_idx, b])
-            solver_model.Add(hc_b == sum(block_load))
+            hc_terms = [hc_used[m_idx, op_idx, b] for m_idx, op_idx in all_ops]
+            solver_model.Add(hc_b == cp_model.LinearExpr.Sum(hc_terms))
             block_hc_vars.append(hc_b)
-        # Minimize max HC across blocks (soft)
+        # Minimize max HC across blocks (soft): una sola restriccion de maximo
         peak_hc = solver_model.NewIntVar(0, plantilla * 10, "peak_hc")
-        for hc_b in block_hc_vars:
-            solver_model.Add(peak_hc >= hc_b)
-        obj_terms.append(W_BALANCE * peak_hc)
-
-    solver_model.Minimize(sum(obj_terms))
+        solver_model.AddMaxEquality(peak_hc, block_hc_vars)
+        obj_vars.append(peak_hc)
+        obj_w.append(W_BALANCE)
+
+    solver_model.Minimize(cp_model.LinearExpr.WeightedSum(obj_vars, obj_w))
+
+    # Warm start: greedy por operacion (bloques de izquierda a derecha al
+    # tope de rate, sin adelantar a la operacion anterior). No tiene que ser
+    # factible (ignora plantilla y robots compartidos): solo orienta la busqueda.
+    greedy = _greedy_day_hint(models_day, x_ub, real_blocks)
+    for key, var in x.items():
+        if x_ub[key] > 0:
+            val = greedy.get(key, 0)
+            solver_model.AddHint(var, val)
+            solver_model.AddHint(active[key], int(val > 0))
+            # Personas: robots 1; manuales los multiplos de rate que cubren val
+            rate_pb = rate_pb_of[key[0]][key[1]][key[2]]
+            hc_val = 0
+            if val > 0:
+                hc_val = 1 if op_robots[key[0]][key[1]] else -(-val // rate_pb)
+            solver_model.AddHint(hc_used[key], min(hc_val, op_hc[key[0]][key[1]]))
+    # Atraso: lo que el greedy deja sin producir (por op si cada op tiene el
+    # suyo; si lo comparten, el de la op que menos produce) y sin sobreproduccion
+    for m_idx, model in enumerate(models_day):
+        n_ops = len(model["operations"])
+        produced = [sum(greedy.get((m_idx, op_idx, b), 0) for b in real_blocks)
+                    for op_idx in range(n_ops)]
+        tard_hint = {}
+        for op_idx in range(n_ops):
+            var = op_tardiness[m_idx, op_idx]
+            pending = model["pares_dia"] - produced[op_idx]
+            tard_hint[var.Index()] = (var, max(tard_hint.get(var.Index(), (var, 0))[1], pending))
+        for var, val in tard_hint.values():
+            solver_model.AddHint(var, val)
+        solver_model.AddHint(overproduction[m_idx], 0)
+    # Robots: la operacion se queda con el primer robot que uso; si no, el
+    # primero libre en el bloque (no tomado por otra operacion). Lo que no
+    # cabe en su cota desborda al siguiente robot.
+    robot_taken = set()
+    for m_idx, op_idx in robot_ops_idx:
+        robots = op_robots[m_idx][op_idx]
+        sticky = None
+        for b in real_blocks:
+            remaining = greedy.get((m_idx, op_idx, b), 0)
+            order = sorted(robots, key=lambda r: (r, b) in robot_taken)
+            if sticky is not None and sticky in order:
+                order.remove(sticky)
+                order.insert(0, sticky)
+            for r in order:
+                key = (m_idx, op_idx, r, b)
+                if key not in y_ub:
+                    continue
+                val = min(remaining, y_ub[key])
+                remaining -= val
+                if val > 0:
+                    robot_taken.add((r, b))
+                    if sticky is None:
+                        sticky = r
+                solver_model.AddHint(y[key], val)
+                solver_model.AddHint(robot_active[key], int(val > 0))
 
     # --- Resolver ---
     solver = cp_model.CpSolver()
@@ -908,6 +1171,10 @@ def schedule_day(models_day: list, params: dict, compiled=None,
     # Workers: reducir si se ejecuta en paralelo (evitar contention)
     num_workers = params.get("num_workers", 4)
     solver.parameters.num_workers = num_workers
+    # Log de busqueda de CP-SAT para barridos de parametros
+    solver.parameters.log_search_progress = bool(params.get("debug", False))
+    for name, value in {**_SOLVER_PARAMS, **params.get("solver_params", {})}.items():
+        setattr(solver.parameters, name, value)
 
     # Callback de parada temprana: si tardiness=0, dejar de buscar
     callback = _EarlyStopCallback(list(tardiness.values()))
@@ -921,12 +1188,15 @@ def schedule_day(models_day: list, params: dict, compiled=None,
         return {"schedule": [], "summary": _empty_summary(time_blocks)}
 
     # --- Extraer solucion ---
+    # x se lee una sola vez y la comparten el programa y el resumen
+    x_vals = _value_grid(solver, x, models_day, num_blocks)
     schedule = _extract_day_schedule(solver, x, y, active, hc_used,
-                                      robot_ops_idx, models_day, time_blocks)
+                                      robot_ops_idx, models_day, time_blocks,
+                                      x_vals=x_vals)
     summary = _build_day_summary(solver, x, tardiness, overproduction,
                                   models_day, time_blocks,
                                   plantilla, resource_cap, status,
-                                  op_tardiness=op_tardiness)
+                                  op_tardiness=op_tardiness, x_vals=x_vals)
 
     return {"schedule": schedule, "summary": summary}
 
@@ -934,10 +1204,12 @@ def schedule_day(models_day: list, params: dict, compiled=None,
 def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
                    compiled=None, operarios: list = None) -> dict:
     """
-    Genera programas horarios para todos los dias de la semana EN PARALELO.
+    Genera programas horarios para todos los dias de la semana.
 
-    Cada dia se resuelve en un thread separado. CP-SAT libera el GIL durante
-    la resolucion, por lo que ThreadPoolExecutor funciona bien.
+    Los dias se resuelven EN SECUENCIA: cada dia consume el estado que deja el
+    anterior (rezago/tardiness, adelantos, fracciones completadas y acumulado
+    por operacion), asi que no se pueden repartir entre threads ni procesos.
+    El paralelismo esta dentro de cada dia (num_workers de CP-SAT).
 
     Args:
         weekly_schedule: salida de optimizer_weekly (lista de {Dia, Modelo, Pares, ...})
@@ -983,6 +1255,12 @@ def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
     for code in model_days:
         model_days[code] = sorted(model_days[code], key=lambda d: day_order_tmp.index(d) if d in day_order_tmp else 99)
 
+    # Workers por dia: 2 por defecto (Render free tier: fraccion de vCPU; la
+    # afinidad del contenedor suele reportar los cores del host). Se sube con
+    # params["num_workers"] o la variable de entorno CPSAT_NUM_WORKERS.
+    per_day_workers = (params.get("num_workers")
+                       or int(os.environ.get("CPSAT_NUM_WORKERS", 2)))
+
     # Preparar tareas para cada dia
     day_tasks = {}  # day_name -> (models_day, day_params)
     results = {}
@@ -1052,7 +1330,7 @@ def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
         if not models_day:
             print(f"    -> models_day VACIO despues de filtrar -> NO_PRODUCTION")
 
-        # Parametros para este dia (workers reducidos para paralelismo)
+        # Parametros para este dia (workers: ver per_day_workers)
         plantilla = day_cfg["plantilla"]
         # Ajustes de plantilla desde restricciones (AUSENCIA_OPERARIO, CAPACIDAD_DIA)
         if compiled:
@@ -1087,7 +1365,7 @@ def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
             "resource_capacity": params["resource_capacity"],
             "plantilla": plantilla,
             "lot_step": params.get("lot_step", 100),
-            "num_workers": 2,  # Render free tier: pocos cores disponibles
+            "num_workers": per_day_workers,
             "day_name": day_name,  # para block_availability y disabled_robots
             "lineas_post": params.get("lineas_post", 0),
             "operator_capacity": op_cap_by_recurso,  # operators per resource type
@@ -1114,6 +1392,8 @@ def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
     rezago_applied_today = set()
     # Guardar pares originales del weekly para cada modelo-dia (proteccion minima)
     weekly_pares_lookup = {}  # {(code, day_name): pares}
+    # Resultados por problema de dia ya resuelto: {clave: (dia, resultado)}
+    solved_days = {}
     for dn, (md_list, _) in day_tasks.items():
         for m in md_list:
             weekly_pares_lookup[(m["codigo"], dn)] = m["pares_dia"]
@@ -1222,8 +1502,23 @@ def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
         total_p = sum(m["pares_dia"] for m in models_day)
         print(f"    -> {day_name}: {len(models_day)} modelos, {total_p} pares")
 
+        # Dias chicos: mas workers solo agregan overhead de arranque
+        solve_params = day_params
+        total_ops = sum(len(m["operations"]) for m in models_day)
+        if total_p < 200 and total_ops < 20:
+            solve_params = {**day_params, "num_workers": 2}
+
         try:
-            results[day_name] = schedule_day(models_day, day_params, compiled)
+            # Dias con el mismo problema (mismos modelos, pares, plantilla y
+            # restricciones del dia) reutilizan el resultado ya resuelto
+            cache_key = _day_cache_key(models_day, solve_params, compiled)
+            if cache_key in solved_days:
+                print(f"    [CACHE] {day_name}: mismo problema que "
+                      f"{solved_days[cache_key][0]}, se reutiliza la solucion")
+                results[day_name] = copy.deepcopy(solved_days[cache_key][1])
+            else:
+                results[day_name] = schedule_day(models_day, solve_params, compiled)
+                solved_days[cache_key] = (day_name, copy.deepcopy(results[day_name]))
             s = results[day_name]["summary"]
             if pares_rezago > 0:
                 s["pares_rezago"] = pares_rezago
@@ -1463,52 +1758,393 @@ def schedule_week(weekly_schedule: list, matched_models: list, params: dict,
     return ordered
 
 
+def _greedy_day_hint(models_day, x_ub, real_blocks):
+    """Heuristica de warm start: {(m, op, b): pares}.
+
+    Cada operacion llena bloques productivos en orden hasta completar
+    pares_dia, limitada por su tope por bloque (x_ub) y por lo acumulado de
+    la operacion anterior (cascada). Ignora capacidad compartida.
+    """
+    greedy = {}
+    for m_idx, model in enumerate(models_day):
+        prev_cum = None
+        for op_idx in range(len(model["operations"])):
+            remaining = model["pares_dia"]
+            cum = []
+            total = 0
+            for rb_idx, b in enumerate(real_blocks):
+                val = min(remaining, x_ub[m_idx, op_idx, b])
+                if prev_cum is not None:
+                    val = min(val, prev_cum[rb_idx] - total)
+                if val > 0:
+                    greedy[m_idx, op_idx, b] = val
+                    remaining -= val
+                    total += val
+                cum.append(total)
+            prev_cum = cum
+    return greedy
+
+
+def _day_cache_key(models_day, day_params, compiled):
+    """Clave canonica del problema de un dia para reutilizar su solucion.
+
+    Incluye modelos (sin max_hc, que schedule_day recalcula), parametros del
+    dia salvo el nombre, y lo que las restricciones compiladas aplican a ese
+    dia (bloques permitidos, entrega de maquila, robots deshabilitados,
+    precedencias).
+    """
+    day_name = day_params.get("day_name", "")
+    models = [
+        {**{k: v for k, v in m.items() if k != "operations"},
+         "operations": [{k: v for k, v in op.items() if k != "max_hc"}
+                        for op in m["operations"]]}
+        for m in models_day
+    ]
+    day_constraints = None
+    if compiled:
+        day_constraints = (
+            compiled.blocks_allowed_on(day_name),
+            [r for r in compiled.maquila_block_restriction if r[1] == day_name],
+            {robot: blocks.get(day_name) for robot, blocks
+             in compiled.disabled_robots.items() if blocks.get(day_name)},
+            compiled.precedences,
+        )
+    params = {k: v for k, v in day_params.items() if k != "day_name"}
+    return json.dumps([models, params, day_constraints], sort_keys=True,
+                      default=str)
+
+
+def _resource_cap_for(recurso, plantilla, resource_cap):
+    """Capacidad (personas/maquinas) de un recurso no-robot por bloque."""
+    # MESA y GENERAL son trabajo manual — capacidad = plantilla, no maquinas
+    if recurso in ("MESA", "GENERAL"):
+        return plantilla
+    return resource_cap.get(recurso, resource_cap.get("GENERAL", 4))
+
+
+def _day_is_slack(models_day, params, compiled, reserved_robots, real_blocks,
+                  blk_sec, op_sec, op_robots):
+    """True si el dia es candidato al atajo sin CP-SAT.
+
+    Sin restricciones compiladas que toquen el dia (precedencias, bloques,
+    maquila, robots deshabilitados), sin conveyor POST ni split "tail", y con
+    la demanda total por HC, recurso y robot por debajo de _FAST_PATH_SLACK
+    de la capacidad del dia.
+    """
+    if reserved_robots:
+        return False
+    if any(m.get("split_position") == "tail" for m in models_day):
+        return False
+    if params.get("lineas_post", 0) > 0 and any(
+            op.get("input_o_proceso", "").startswith("POST")
+            for m in models_day for op in m["operations"]):
+        return False
+
+    day_name = params.get("day_name", "")
+    if compiled:
+        codes = [m.get("codigo", "") for m in models_day]
+        for (mc, _, _, _) in compiled.precedences:
+            if any(c.startswith(str(mc)) for c in codes):
+                return False
+        allowed_by_code = compiled.blocks_allowed_on(day_name)
+        if any(c in allowed_by_code for c in codes):
+            return False
+        if any(r[1] == day_name for r in compiled.maquila_block_restriction):
+            return False
+        if any(day_name in day_blocks
+               for day_blocks in compiled.disabled_robots.values()):
+            return False
+
+    plantilla = params["plantilla"]
+    resource_cap = params["resource_capacity"]
+    day_sec = sum(blk_sec[b] for b in real_blocks)
+    hc_demand = 0
+    resource_demand = {}
+    robot_demand = {}
+    for m_idx, model in enumerate(models_day):
+        pares_dia = model["pares_dia"]
+        for op_idx, op in enumerate(model["operations"]):
+            demand = pares_dia * op_sec[m_idx][op_idx]
+            hc_demand += demand
+            robots = op_robots[m_idx][op_idx]
+            if robots:
+                for r in robots:
+                    robot_demand[r] = robot_demand.get(r, 0) + demand / len(robots)
+            else:
+                recurso = op["recurso"]
+                resource_demand[recurso] = resource_demand.get(recurso, 0) + demand
+
+    if hc_demand > _FAST_PATH_SLACK * plantilla * day_sec:
+        return False
+    for recurso, demand in resource_demand.items():
+        cap = _resource_cap_for(recurso, plantilla, resource_cap)
+        if demand > _FAST_PATH_SLACK * cap * day_sec:
+            return False
+    return all(demand <= _FAST_PATH_SLACK * day_sec
+               for demand in robot_demand.values())
+
+
+def _greedy_day_solution(models_day, params, x_ub, real_blocks, blk_sec,
+                         op_sec, op_robots, op_hc, rate_pb_of):
+    """Greedy de _greedy_day_hint validado contra las restricciones duras.
+
+    Devuelve {"x": {(m, op, b): pares}, "hc": {(m, op, b): personas},
+    "robot": {(m, op): robot}} si completa todos los pares sin tardiness ni
+    exceso de plantilla/recurso/operarios, o None si algo no cuadra (el dia
+    se resuelve entonces con CP-SAT).
+    """
+    plantilla = params["plantilla"]
+    resource_cap = params["resource_capacity"]
+    step = params.get("lot_step", 100)
+    op_capacity = params.get("operator_capacity", {})
+    greedy = _greedy_day_hint(models_day, x_ub, real_blocks)
+
+    # Un robot fijo por operacion, sin compartirlo con otra operacion
+    robot_of = {}
+    for m_idx, model in enumerate(models_day):
+        for op_idx in range(len(model["operations"])):
+            robots = op_robots[m_idx][op_idx]
+            if not robots:
+                continue
+            free = [r for r in robots if r not in robot_of.values()]
+            if not free:
+                return None
+            robot_of[m_idx, op_idx] = free[0]
+
+    # Por operacion: pares completos, contiguidad y multiplos del rate
+    hc = {}
+    for m_idx, model in enumerate(models_day):
+        for op_idx in range(len(model["operations"])):
+            used = [rb_idx for rb_idx, b in enumerate(real_blocks)
+                    if greedy.get((m_idx, op_idx, b), 0) > 0]
+            total = sum(greedy.get((m_idx, op_idx, b), 0) for b in real_blocks)
+            if total != model["pares_dia"]:
+                return None
+            if used and used != list(range(used[0], used[-1] + 1)):
+                return None
+            for rb_idx in used:
+                b = real_blocks[rb_idx]
+                val = greedy[m_idx, op_idx, b]
+                is_last = rb_idx == used[-1]
+                rate_pb = rate_pb_of[m_idx][op_idx][b]
+                if op_robots[m_idx][op_idx]:
+                    if not is_last and val < rate_pb:
+                        return None
+                    if val * op_sec[m_idx][op_idx] > blk_sec[b]:
+                        return None
+                    hc[m_idx, op_idx, b] = 1
+                    continue
+                step_pb = min(step, rate_pb)
+                if val % rate_pb == 0:
+                    h = val // rate_pb
+                elif is_last and step_pb > 0 and val % step_pb == 0:
+                    h = val // step_pb
+                else:
+                    return None
+                if h > op_hc[m_idx][op_idx]:
+                    return None
+                hc[m_idx, op_idx, b] = h
+
+    # Por bloque: plantilla, capacidad de recurso y operarios por recurso
+    for b in real_blocks:
+        load = 0
+        resource_load = {}
+        hc_by_recurso = {}
+        for m_idx, model in enumerate(models_day):
+            for op_idx, op in enumerate(model["operations"]):
+                val = greedy.get((m_idx, op_idx, b), 0)
+                if val <= 0:
+                    continue
+                sec_load = val * op_sec[m_idx][op_idx]
+                load += sec_load
+                if op_robots[m_idx][op_idx]:
+                    continue
+                recurso = op["recurso"]
+                resource_load[recurso] = resource_load.get(recurso, 0) + sec_load
+                parts = [p.strip() for p in recurso.split(",")] if "," in recurso else [recurso]
+                for part in parts:
+                    hc_by_recurso[part] = hc_by_recurso.get(part, 0) + hc[m_idx, op_idx, b]
+        if load > plantilla * blk_sec[b]:
+            return None
+        for recurso, sec_load in resource_load.items():
+            if sec_load > _resource_cap_for(recurso, plantilla, resource_cap) * blk_sec[b]:
+                return None
+        for recurso, used_hc in hc_by_recurso.items():
+            cap = op_capacity.get(recurso)
+            if cap is not None and used_hc > cap:
+                return None
+
+    return {"x": greedy, "hc": hc, "robot": robot_of}
+
+
+class _FixedSolution:
+    """Lectura tipo CpSolver (Value/StatusName) sobre una solucion fija.
+
+    Permite reutilizar _extract_day_schedule y _build_day_summary con la
+    solucion del atajo de dias holgados: las "variables" son claves del dict.
+    """
+
+    def __init__(self, values):
+        self._values = values
+
+    def Value(self, key):
+        return self._values.get(key, 0)
+
+    def StatusName(self, status=None):
+        return "FEASIBLE"
+
+
+def _fixed_day_result(fast, models_day, time_blocks, plantilla, resource_cap):
+    """Arma {schedule, summary} a partir de la salida de _greedy_day_solution."""
+    num_blocks = len(time_blocks)
+    values = {}
+    x, y, active, hc_used = {}, {}, {}, {}
+    for m_idx, model in enumerate(models_day):
+        for op_idx, op in enumerate(model["operations"]):
+            robot = fast["robot"].get((m_idx, op_idx))
+            robots = op.get("robots", [])
+            for b in range(num_blocks):
+                key = (m_idx, op_idx, b)
+                x[key] = ("x",) + key
+                active[key] = ("act",) + key
+                hc_used[key] = ("hc",) + key
+                values[x[key]] = fast["x"].get(key, 0)
+                values[hc_used[key]] = fast["hc"].get(key, 0)
+                values[active[key]] = int(values[x[key]] > 0)
+                for r in robots:
+                    y[m_idx, op_idx, r, b] = ("y", m_idx, op_idx, r, b)
+                    if r == robot:
+                        values[y[m_idx, op_idx, r, b]] = values[x[key]]
+
+    tardiness = {m_idx: ("tard", m_idx) for m_idx in range(len(models_day))}
+    overproduction = {m_idx: ("over", m_idx) for m_idx in range(len(models_day))}
+    op_tardiness = {(m_idx, op_idx): ("otard", m_idx, op_idx)
+                    for m_idx, model in enumerate(models_day)
+                    for op_idx in range(len(model["operations"]))}
+
+    solution = _FixedSolution(values)
+    x_vals = _value_grid(solution, x, models_day, num_blocks)
+    schedule = _extract_day_schedule(solution, x, y, active, hc_used,
+                                     list(fast["robot"]), models_day,
+                                     time_blocks, x_vals=x_vals)
+    summary = _build_day_summary(solution, x, tardiness, overproduction,
+                                 models_day, time_blocks, plantilla,
+                                 resource_cap, cp_model.FEASIBLE,
+                                 op_tardiness=op_tardiness, x_vals=x_vals)
+    return {"schedule": schedule, "summary": summary}
+
+
+def _aggregate_cum(solver_model, cum_vars, ub, kind, name):
+    """min/max de acumulados de un grupo de precedencia en un bloque.
+
+    Con una sola variable la devuelve tal cual (sin variable ni restriccion).
+    """
+    if len(cum_vars) == 1:
+        return cum_vars[0]
+    agg = solver_model.NewIntVar(0, ub, name)
+    if kind == "min":
+        solver_model.AddMinEquality(agg, cum_vars)
+    else:
+        solver_model.AddMaxEquality(agg, cum_vars)
+    return agg
+
+
+def _prefix_sums(solver_model, x, m_idx, op_idx, num_blocks, real_blocks, ub, zero):
+    """Acumulados por bloque de x[m, op, *]: lista con una entrada por bloque.
+
+    Una IntVar por bloque productivo (cum[b] = cum[b-1] + x[b]); el primero
+    es x mismo y los bloques COMIDA repiten el acumulado anterior.
+    """
+    cum = []
+    prev = None
+    for b in range(num_blocks):
+        if b in real_blocks:
+            if prev is None:
+                prev = x[m_idx, op_idx, b]
+            else:
+                c = solver_model.NewIntVar(0, ub, f"cum_{m_idx}_{op_idx}_{b}")
+                solver_model.Add(c == prev + x[m_idx, op_idx, b])
+                prev = c
+        cum.append(prev if prev is not None else zero)
+    return cum
+
+
+def _solution_values(solver, variables):
+    """Valores de una lista de variables como array int64.
+
+    Con CpSolver lee la respuesta una sola vez y la indexa por var.Index()
+    (sin un cruce a C++ por variable); con _FixedSolution usa Value().
+    """
+    if isinstance(solver, cp_model.CpSolver):
+        solution = solver.ResponseProto().solution
+        return np.fromiter((solution[v.Index()] for v in variables),
+                           dtype=np.int64, count=len(variables))
+    return np.fromiter(map(solver.Value, variables),
+                       dtype=np.int64, count=len(variables))
+
+
+def _value_grid(solver, var_of, models_day, num_blocks):
+    """Lee var_of[m, op, b] del solver en un array (modelos, max_ops, bloques).
+
+    Una sola lectura plana de la solucion; las posiciones de operaciones
+    inexistentes (modelos con menos ops) quedan en 0.
+    """
+    max_ops = max((len(m["operations"]) for m in models_day), default=0)
+    grid = np.zeros((len(models_day), max_ops, num_blocks), dtype=np.int64)
+    flat = [var_of[m_idx, op_idx, b]
+            for m_idx, model in enumerate(models_day)
+            for op_idx in range(len(model["operations"]))
+            for b in range(num_blocks)]
+    values = _solution_values(solver, flat)
+    pos = 0
+    for m_idx, model in enumerate(models_day):
+        n = len(model["operations"]) * num_blocks
+        if n:
+            grid[m_idx, :len(model["operations"])] = values[pos:pos + n].reshape(-1, num_blocks)
+            pos += n
+    return grid
+
+
 def _extract_day_schedule(solver, x, y, active, hc_used, robot_ops_idx,
-                           models_day, time_blocks):
-    """Extrae el programa horario del dia."""
+                           models_day, time_blocks, x_vals=None):
+    """Extrae el programa horario del dia.
+
+    x_vals: grilla de x ya leida (_value_grid); si falta se lee aqui.
+    """
     num_blocks = len(time_blocks)
     schedule = []
 
     # Set de (m_idx, op_idx) con robots para lookup rapido
     robot_ops_set = set(robot_ops_idx)
 
+    # Pares y HC (entero, no fraccionario) por [m, op, b] en una sola lectura
+    if x_vals is None:
+        x_vals = _value_grid(solver, x, models_day, num_blocks)
+    hc_vals = _value_grid(solver, hc_used, models_day, num_blocks)
+    op_totals = x_vals.sum(axis=2)
+
     for m_idx, model in enumerate(models_day):
         for op_idx, op in enumerate(model["operations"]):
-            block_pares = []
-            total_pares = 0
-            for b in range(num_blocks):
-                pares = solver.Value(x[m_idx, op_idx, b])
-                block_pares.append(pares)
-                total_pares += pares
-
+            total_pares = int(op_totals[m_idx, op_idx])
             if total_pares <= 0:
                 continue
-
-            # HC por bloque: leer directamente del solver (entero, no fraccionario)
-            hc_block_values = [
-                solver.Value(hc_used[m_idx, op_idx, b])
-                for b in range(num_blocks)
-            ]
+            block_pares = x_vals[m_idx, op_idx].tolist()
+            hc_block_values = hc_vals[m_idx, op_idx].tolist()
             max_hc_val = max(hc_block_values) if hc_block_values else 0
+            robots = op.get("robots", [])
 
             # Para operaciones con robots, extraer uso por robot POR BLOQUE
             robots_used = []
             robot_per_block = [None] * num_blocks
             if (m_idx, op_idx) in robot_ops_set:
-                robots = op.get("robots", [])
-                for r in robots:
-                    r_pares = sum(
-                        solver.Value(y[m_idx, op_idx, r, b])
-                        for b in range(num_blocks)
-                    )
-                    if r_pares > 0:
-                        robots_used.append(r)
-                # Determinar qué robot se usa en cada bloque
-                for b in range(num_blocks):
-                    for r in robots:
-                        if solver.Value(y[m_idx, op_idx, r, b]) > 0:
-                            robot_per_block[b] = r
-                            break
+                y_pos = _solution_values(
+                    solver, [y[m_idx, op_idx, r, b] for r in robots for b in range(num_blocks)]
+                ).reshape(len(robots), num_blocks) > 0
+                robots_used = [r for r, row in zip(robots, y_pos.any(axis=1)) if row]
+                # Determinar qué robot se usa en cada bloque (el primero con y > 0)
+                first_r = y_pos.argmax(axis=0).tolist()
+                for b in np.flatnonzero(y_pos.any(axis=0)).tolist():
+                    robot_per_block[b] = robots[first_r[b]]
 
             # Si usa multiples robots, generar una fila por robot
             distinct_robots = list(dict.fromkeys(r for r in robot_per_block if r is not None))
@@ -1537,7 +2173,7 @@ def _extract_day_schedule(solver, x, y, active, hc_used, robot_ops_idx,
                         "hc_per_block": r_hc,
                         "robots_used": [robot],
                         "robot_per_block": [robot if robot_per_block[b] == robot else None for b in range(num_blocks)],
-                        "robots_eligible": op.get("robots", []),
+                        "robots_eligible": robots,
                         "hc_multiplier": op.get("max_hc", 1),
                     })
             else:
@@ -1554,7 +2190,7 @@ def _extract_day_schedule(solver, x, y, active, hc_used, robot_ops_idx,
                     "hc_per_block": hc_block_values,
                     "robots_used": robots_used,
                     "robot_per_block": robot_per_block,
-                    "robots_eligible": op.get("robots", []),
+                    "robots_eligible": robots,
                     "hc_multiplier": op.get("max_hc", 1),
                 })
 
@@ -1623,31 +2259,39 @@ def _extract_day_schedule(solver, x, y, active, hc_used, robot_ops_idx,
 
 def _build_day_summary(solver, x, tardiness, overproduction, models_day,
                         time_blocks, plantilla, resource_cap, status,
-                        op_tardiness=None):
-    """Construye resumen del dia."""
+                        op_tardiness=None, x_vals=None):
+    """Construye resumen del dia.
+
+    x_vals: grilla de x ya leida (_value_grid); si falta se lee aqui.
+    """
     num_blocks = len(time_blocks)
+    if x_vals is None:
+        x_vals = _value_grid(solver, x, models_day, num_blocks)
 
-    # HC por bloque
+    # HC por bloque: carga (pares * sec_per_pair) sumada sobre modelos y ops
+    sec_arr = np.zeros(x_vals.shape[:2])
+    for m_idx, model in enumerate(models_day):
+        for op_idx, op in enumerate(model["operations"]):
+            sec_arr[m_idx, op_idx] = op["sec_per_pair"]
+    load_sec = (x_vals * sec_arr[:, :, None]).sum(axis=(0, 1))
+    block_pares = x_vals.sum(axis=(0, 1)).tolist()
     block_hc = []
-    block_pares = []
     for b in range(num_blocks):
         block_sec = time_blocks[b]["minutes"] * 60
-        total_load_sec = 0
-        total_pares_b = 0
-        for m_idx, model in enumerate(models_day):
-            for op_idx, op in enumerate(model["operations"]):
-                pares = solver.Value(x[m_idx, op_idx, b])
-                total_load_sec += pares * op["sec_per_pair"]
-                total_pares_b += pares
-        hc = total_load_sec / block_sec if block_sec > 0 else 0
+        hc = float(load_sec[b]) / block_sec if block_sec > 0 else 0
         block_hc.append(round(hc, 1))
-        block_pares.append(total_pares_b)
+
+    # Tardiness y overproduction de todos los modelos en una lectura
+    n_models = len(models_day)
+    tard_over = _solution_values(
+        solver, [tardiness[m_idx] for m_idx in range(n_models)]
+        + [overproduction[m_idx] for m_idx in range(n_models)]).tolist()
 
     # Tardiness por modelo y total
     tardiness_by_model = {}
     total_tard = 0
     for m_idx, model in enumerate(models_day):
-        t = solver.Value(tardiness[m_idx])
+        t = tard_over[m_idx]
         total_tard += t
         if t > 0:
             tardiness_by_model[model["codigo"]] = t
@@ -1656,7 +2300,7 @@ def _build_day_summary(solver, x, tardiness, overproduction, models_day,
     overproduction_by_model = {}
     total_over = 0
     for m_idx, model in enumerate(models_day):
-        o = solver.Value(overproduction[m_idx])
+        o = tard_over[n_models + m_idx]
         total_over += o
         if o > 0:
             overproduction_by_model[model["codigo"]] = o
@@ -1667,12 +2311,16 @@ def _build_day_summary(solver, x, tardiness, overproduction, models_day,
     completed_ops_by_model = {}
     remaining_ops_by_model = {}
     if op_tardiness:
+        ot_keys = [(m_idx, op_idx) for m_idx, model in enumerate(models_day)
+                   for op_idx in range(len(model["operations"]))]
+        ot_vals = dict(zip(ot_keys, _solution_values(
+            solver, [op_tardiness[k] for k in ot_keys]).tolist()))
         for m_idx, model in enumerate(models_day):
             code = model["codigo"]
             completed = []
             remaining = []
             for op_idx in range(len(model["operations"])):
-                ot = solver.Value(op_tardiness[m_idx, op_idx])
+                ot = ot_vals[m_idx, op_idx]
                 if ot == 0:
                     completed.append(op_idx)
                 else:
@@ -1686,11 +2334,12 @@ def _build_day_summary(solver, x, tardiness, overproduction, models_day,
 
     # Per-op production tracking: actual pairs produced per operation (for cross-day pipeline cap)
     produced_by_op = {}  # {codigo: {fraccion: pares_produced}}
+    op_totals = x_vals.sum(axis=2)
     for m_idx, model in enumerate(models_day):
         code = model["codigo"]
         op_production = {}
         for op_idx, op in enumerate(model["operations"]):
-            total_op_pares = sum(solver.Value(x[m_idx, op_idx, b]) for b in range(num_blocks))
+            total_op_pares = int(op_totals[m_idx, op_idx])
             frac = op.get("fraccion", op_idx)
             op_production[frac] = total_op_pares
         if op_production:
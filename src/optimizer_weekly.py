@@ -14,6 +14,7 @@ Variables de decision:
 El rate (pares/hora) del catalogo determina cuanto trabajo implica cada par.
 """
 
+import numpy as np
 from ortools.sat.python import cp_model
 
 # Pesos del objetivo multi-criterio
@@ -27,6 +28,28 @@ W_BALANCE = 50          # por segundo de desbalance entre dias (load en segundos
 W_PARES_BALANCE = 500   # por par de diferencia max-min entre dias (balance directo en pares)
 W_EARLY = 1             # por par * indice_dia (solo tiebreaker, no pelear contra balance)
 
+# Parametros CP-SAT para esta familia de modelos (misma forma cada semana:
+# ~5-15 modelos x 5-6 dias, objetivo ponderado con muchos booleanos).
+# Se aplican en ambas etapas del solve; params["num_workers"] y
+# params["solver_params"] (dict de campos de CpSolver) los sobreescriben
+# para barridos o maquinas con otro numero de nucleos.
+SOLVER_PARAMS = {
+    "num_workers": 8,
+    "linearization_level": 2,
+    "cp_model_probing_level": 1,
+    "symmetry_level": 0,
+}
+
+# Corte temprano de la etapa 2 (objetivo completo): detener cuando la
+# solucion esta a <1% (o <100 unidades) de la cota inferior probada.
+# La etapa 1 (tardiness) siempre corre hasta optimo o timeout.
+STAGE2_RELATIVE_GAP = 0.01
+STAGE2_ABSOLUTE_GAP = 100
+
+# True = reenviar el log de busqueda de CP-SAT a stdout (diagnostico);
+# params["debug"] lo activa por llamada
+SOLVER_LOG = False
+
 
 def optimize(models: list, params: dict, compiled=None) -> tuple:
     """
@@ -40,6 +63,121 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
     Returns:
         (schedule, summary)
     """
+    solver_model, v = _build_model(models, params, compiled)
+
+    days = params["days"]
+    num_days = len(days)
+    num_models = len(models)
+    step = v["step"]
+    total_prod = v["total_prod"]
+    x, y, is_odd = v["x"], v["y"], v["is_odd"]
+    tardiness = v["tardiness"]
+    obj_vars, obj_w = v["obj_vars"], v["obj_w"]
+
+    # --- Resolver (lexicografico en dos etapas) ---
+    # Etapa 1: solo tardiness ponderado (maxima prioridad).
+    # Etapa 2: fijar tardiness <= optimo de etapa 1 y minimizar el resto,
+    #          arrancando desde la solucion de etapa 1 (hints).
+
+    tard_expr = v["tard_expr"]
+    solver_model.Minimize(tard_expr)
+
+    # Warm start: solucion greedy LPT como hint (si no es factible, el solver
+    # la usa solo como guia de busqueda). El greedy empaca contra cap_ub; se
+    # recorta a x_ub para que los hints (y el atajo de abajo) respeten el
+    # dominio de x cuando el throughput limita.
+    greedy = _greedy_schedule(total_prod, v["adjusted_sec"], v["regular_caps"],
+                              v["cap_ub"], v["min_lots"], days, step)
+    for (m, d), val in greedy.items():
+        greedy[m, d] = min(val, v["x_ub"][m][d] // step * step)
+    for m in range(num_models):
+        for d in range(num_days):
+            val = greedy.get((m, d), 0)
+            solver_model.AddHint(x[m][d], val)
+            if v["x_ub"][m][d] == 0:
+                continue  # y / is_odd son la constante 0
+            solver_model.AddHint(y[m][d], int(val > 0))
+            solver_model.AddHint(is_odd[m][d], (val // step) & 1)
+        # Atraso: lo que el greedy deja sin asignar
+        planned = sum(greedy.get((m, d), 0) for d in range(num_days))
+        solver_model.AddHint(tardiness[m], max(0, total_prod[m] - planned))
+
+    # Atajo trivial: si el greedy cubre todo el volumen, tardiness 0 es el
+    # optimo de etapa 1 (cota inferior). Basta verificar que el greedy sea
+    # factible con las x fijas (presolve lo resuelve sin busqueda); si no lo
+    # es, se corre la etapa 1 completa.
+    solver = None
+    if all(sum(greedy.get((m, d), 0) for d in range(num_days)) >= total_prod[m]
+           for m in range(num_models)):
+        fixed_model = solver_model.Clone()
+        for m in range(num_models):
+            for d in range(num_days):
+                fixed_model.Add(x[m][d] == greedy.get((m, d), 0))
+        solver = _make_solver(2, params)
+        status = solver.Solve(fixed_model)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and solver.ObjectiveValue() == 0:
+            print("    [WEEKLY] etapa 1 omitida: greedy factible sin tardiness")
+        else:
+            solver = None
+
+    if solver is None:
+        solver = _make_solver(10, params)
+        status = solver.Solve(solver_model)
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        raise RuntimeError(
+            f"No se encontro solucion factible. Estado: {solver.StatusName(status)}"
+        )
+
+    best_tard = int(solver.ObjectiveValue())
+    stage1_time = solver.WallTime()
+    solver_model.Add(tard_expr <= best_tard)
+    solver_model.ClearHints()
+    for i, val in enumerate(solver.ResponseProto().solution):
+        solver_model.AddHint(solver_model.GetIntVarFromProtoIndex(i), val)
+
+    solver_model.ClearObjective()
+    solver_model.Minimize(cp_model.LinearExpr.WeightedSum(obj_vars, obj_w))
+
+    solver = _make_solver(20, params)
+    solver.parameters.relative_gap_limit = STAGE2_RELATIVE_GAP
+    solver.parameters.absolute_gap_limit = STAGE2_ABSOLUTE_GAP
+    status = solver.Solve(solver_model)
+    print(f"    [WEEKLY] etapa 2: {solver.StatusName(status)}, "
+          f"obj={solver.ObjectiveValue():.0f}, "
+          f"bound={solver.BestObjectiveBound():.0f}, "
+          f"t={solver.WallTime():.1f}s")
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        raise RuntimeError(
+            f"No se encontro solucion factible. Estado: {solver.StatusName(status)}"
+        )
+
+    # --- Extraer solucion ---
+
+    # Leer la solucion una sola vez (matrices modelos x dias)
+    X = _solution_values(solver, [var for row in x for var in row]).reshape(num_models, num_days)
+    Y = _solution_values(solver, [var for row in y for var in row]).reshape(num_models, num_days)
+    T = _solution_values(solver, tardiness)
+
+    schedule = _extract_schedule(X, models, days)
+    summary = _build_summary(solver, X, Y, T, v["span"], v["day_loads"],
+                             v["overtime_used"], v["regular_caps"],
+                             v["overtime_caps"], models, days, status)
+    summary["wall_time_s"] = round(stage1_time + solver.WallTime(), 2)
+
+    return schedule, summary
+
+
+def _build_model(models: list, params: dict, compiled=None) -> tuple:
+    """
+    Construye el modelo CP-SAT semanal sin resolverlo.
+
+    Returns:
+        (solver_model, vars): vars es un dict con las variables de decision,
+        los terminos del objetivo y los lookups precomputados que usan el
+        warm start, la resolucion y la extraccion.
+    """
     solver_model = cp_model.CpModel()
 
     days = params["days"]
@@ -53,6 +191,8 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
 
     min_lot = params.get("min_lot_size", 100)
     step = params.get("lot_step", 100)
+    # Tope de operaciones por dia = plantilla * factor (None = sin tope)
+    max_ops_factor = params.get("max_ops_factor", 3)
 
     # Redondear total_producir al multiplo de step superior.
     # El solver solo puede asignar multiplos de step; si total_producir no es
@@ -67,7 +207,7 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
     # Detectar modelos con operaciones MAQUILA y calcular sec_per_pair ajustado
     # MAQUILA es trabajo externo: no consume capacidad interna
     maquila_models = set()
-    adjusted_sec = {}  # m -> sec_per_pair sin MAQUILA
+    adjusted_sec = []  # [m] -> sec_per_pair sin MAQUILA
     for m, model in enumerate(models):
         maquila_sec = 0
         for op in model.get("operations", []):
@@ -75,132 +215,242 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
                 maquila_sec += op.get("sec_per_pair", 0)
         if maquila_sec > 0:
             maquila_models.add(m)
-            adjusted_sec[m] = max(1, model["total_sec_per_pair"] - maquila_sec)
+            adjusted_sec.append(max(1, model["total_sec_per_pair"] - maquila_sec))
         else:
-            adjusted_sec[m] = model["total_sec_per_pair"]
+            adjusted_sec.append(model["total_sec_per_pair"])
 
-    # --- Variables de decision ---
+    # Pre-computar lookups por modelo y por dia (una sola vez, listas planas)
+    # Factor de eficiencia: contiguidad, comida y cascade overhead reducen capacidad.
+    # Con multi-HC y mas modelos por dia, hay mas overhead de cascada.
+    EFF = 0.85
+    total_prod = [model["total_producir"] for model in models]
+    num_ops_list = [model.get("num_ops", 1) for model in models]
+    is_sat = [day_cfg["is_saturday"] for day_cfg in days]
+    saturday_indices = [d for d in range(num_days) if is_sat[d]]
+    normal_day_indices = [d for d in range(num_days) if not is_sat[d]]
+    plantilla = [day_cfg["plantilla"] for day_cfg in days]
+    day_minutes_reg = [day_cfg["minutes"] for day_cfg in days]
+    day_minutes_all = [day_cfg["minutes"] + day_cfg.get("minutes_ot", 0)
+                       for day_cfg in days]
+    regular_caps = []
+    overtime_caps = []
+    for day_cfg in days:
+        regular_caps.append(
+            int(day_cfg["plantilla"] * day_cfg["minutes"] * 60 * EFF))
+        ot_minutes = day_cfg.get("minutes_ot", 0)
+        ot_plantilla = day_cfg.get("plantilla_ot", day_cfg["plantilla"])
+        overtime_caps.append(int(ot_plantilla * ot_minutes * 60 * EFF))
 
-    # x[m, d] = pares de modelo m a producir en dia d (forzado a multiplos de step)
-    # z[m, d] = numero de lotes de 'step' pares (variable auxiliar entera)
-    x = {}
-    z = {}
+    # 4. Throughput maximo por modelo/dia: considera el cuello de botella Y la
+    #    profundidad de cascada. En el diario, las operaciones corren en cascada
+    #    (frac 1 antes que frac 2, etc.), asi que un modelo con 13 fracciones
+    #    necesita mas bloques que uno con 3. Cada paso de cascada consume ~0.5
+    #    bloques de startup (con multi-HC del diario, las ops manuales terminan
+    #    mas rapido y la pipeline avanza).
+    #    Se calcula antes de crear x: el tope entra directo como cota del
+    #    dominio de x[m][d] (no como restriccion aparte).
+    max_throughput = [[0] * num_days for _ in range(num_models)]
+    # Promedio de plantilla (invariante por modelo)
+    avg_plantilla = sum(plantilla) / max(num_days, 1)
     for m, model in enumerate(models):
-        max_batches = model["total_producir"] // step
+        ops = [op for op in model.get("operations", []) if op.get("recurso") != "MAQUILA"]
+        if ops:
+            bottleneck_op = min(ops, key=lambda op: op.get("rate", 999))
+            bottleneck_rate = bottleneck_op.get("rate", 100)
+        else:
+            n_ops = model.get("num_ops", 1)
+            avg_sec = model["total_sec_per_pair"] / max(n_ops, 1)
+            bottleneck_rate = 3600 / avg_sec if avg_sec > 0 else 100
+
+        num_ops = len(ops)
+        # HC boost for manual bottlenecks (MESA/GENERAL): multiple people can work
+        # the same operation, effectively multiplying the bottleneck rate.
+        # Robots always HC=1, but MESA ops get HC=2-3 in the daily solver.
+        bottleneck_recurso = bottleneck_op.get("recurso", "GENERAL") if ops else "GENERAL"
+        if bottleneck_recurso in ("MESA", "GENERAL", None, ""):
+            # Conservative HC boost: daily solver typically assigns HC=2-3 for MESA
+            hc_boost = max(2.0, min(4.0, avg_plantilla / max(1, num_models)))
+        else:
+            hc_boost = 1.0
+
         for d in range(num_days):
-            x[m, d] = solver_model.NewIntVar(
-                0, model["total_producir"], f"x_{m}_{d}"
-            )
-            z[m, d] = solver_model.NewIntVar(0, max_batches, f"z_{m}_{d}")
-            solver_model.Add(x[m, d] == step * z[m, d])
+            day_minutes = day_minutes_reg[d]
+            # Usar solo minutos regulares para throughput per-model.
+            # Overtime agrega capacidad total pero NO extiende la ventana
+            # de cascada (un modelo compartiendo el dia con otros no puede
+            # usar los bloques de overtime si los regulares estan ocupados).
+            block_duration = 60
+            total_blocks = day_minutes / block_duration
+            # Cascade penalty: more conservative (0.15 vs 0.3) — the daily solver
+            # can parallelize across robots, so cascade overhead is smaller than
+            # assumed. For ROBOT-bottleneck models, parallelism across multiple
+            # machine instances further reduces the effective startup cost.
+            cascade_mult = 0.15 if bottleneck_recurso not in ("MESA", "GENERAL", None, "") else 0.30
+            cascade_startup = (num_ops - 1) * cascade_mult
+            effective_blocks = max(1, total_blocks - cascade_startup)
+            cascade_eff = effective_blocks / total_blocks if total_blocks > 0 else 1
+            # Factor 0.90: the daily solver handles physical machine constraints,
+            # so the weekly just needs a light cap to avoid wild overestimation.
+            # Was 0.70 — too aggressive, caused tardiness on isolated models.
+            throughput_factor = 0.90
+            raw_throughput = bottleneck_rate * hc_boost * day_minutes / 60 * cascade_eff * throughput_factor
+            # Round to nearest step (not floor) to avoid losing capacity to truncation.
+            cap_md = int(round(raw_throughput / step)) * step
+            cap_md = max(cap_md, step)  # never round to 0
+            max_throughput[m][d] = min(cap_md, total_prod[m])
+            if d == 0:  # solo imprimir para el primer dia
+                print(f"    [THROUGHPUT] {model.get('modelo_num','?')}: "
+                      f"bottleneck={bottleneck_rate}, hc_boost={hc_boost:.1f}, "
+                      f"ops={num_ops}, factor={throughput_factor:.2f}, "
+                      f"minutes={day_minutes}, cascade_eff={cascade_eff:.2f}, "
+                      f"max_throughput={max_throughput[m][d]}")
 
-    # y[m, d] = 1 si modelo m se produce en dia d (indicador binario)
-    y = {}
-    for m, model in enumerate(models):
+    # Dias donde el compilado prohibe producir cada modelo (disponibilidad,
+    # entrega de maquila, avance, dias congelados): esas celdas quedan con
+    # cota 0 y sin variables propias.
+    blocked = _blocked_days(models, days, compiled)
+
+    # --- Variables de decision ---
+
+    # x[m][d] = pares de modelo m a producir en dia d
+    # Dominio escalonado {0, step, 2*step, ...}: multiplos de step sin variable
+    # auxiliar de lotes ni igualdad x == step * z.
+    # Cota superior por dia: lo que cabe en regular + overtime de ese dia y
+    # el throughput maximo del modelo (restriccion 4).
+    # Almacenamiento en listas 2D [m][d] (indexado directo, sin hash de tuplas)
+    # cap_ub = solo la cota de capacidad: la usa el greedy del warm start
+    # (empacar con el throughput como tope dio peores hints en pruebas).
+    x = [[None] * num_days for _ in range(num_models)]
+    x_ub = [[0] * num_days for _ in range(num_models)]
+    cap_ub = [[0] * num_days for _ in range(num_models)]
+    for m in range(num_models):
         for d in range(num_days):
-            y[m, d] = solver_model.NewBoolVar(f"y_{m}_{d}")
+            cap = 0 if d in blocked[m] else total_prod[m]
+            if adjusted_sec[m] > 0:
+                day_cap_sec = regular_caps[d] + overtime_caps[d]
+                cap = min(cap, (day_cap_sec // adjusted_sec[m] // step) * step)
+            cap_ub[m][d] = cap
+            ub = min(cap, max_throughput[m][d])
+            x_ub[m][d] = ub
+            x[m][d] = solver_model.NewIntVarFromDomain(
+                cp_model.Domain.FromValues(list(range(0, ub + 1, step))),
+                f"x_{m}_{d}")
+
+    # live[m][d]: la celda puede producir (x_ub > 0). En las demas x ya es
+    # {0} y y / is_odd apuntan a la constante 0, sin restricciones ni
+    # terminos de objetivo.
+    zero = solver_model.NewConstant(0)
+    live = [[x_ub[m][d] > 0 for d in range(num_days)] for m in range(num_models)]
+
+    # y[m][d] = 1 si modelo m se produce en dia d (indicador binario)
+    y = [[zero] * num_days for _ in range(num_models)]
+    for m in range(num_models):
+        for d in range(num_days):
+            if live[m][d]:
+                y[m][d] = solver_model.NewBoolVar(f"y_{m}_{d}")
 
-    # is_odd[m, d] = 1 si z es impar (lote no multiplo de 100, ej: 50, 150, 250...)
-    # z[m,d] = 2*w[m,d] + is_odd[m,d] donde w es entero
-    is_odd = {}
-    w = {}
-    for m, model in enumerate(models):
-        max_batches = model["total_producir"] // step
+    # is_odd[m][d] = 1 si x/step es impar (lote no multiplo de 100, ej: 50, 150, 250...)
+    # Reificado sobre el dominio de x (lotes pares / impares), sin entero auxiliar
+    is_odd = [[zero] * num_days for _ in range(num_models)]
+    for m in range(num_models):
         for d in range(num_days):
-            w[m, d] = solver_model.NewIntVar(0, max_batches // 2, f"w_{m}_{d}")
-            is_odd[m, d] = solver_model.NewBoolVar(f"odd_{m}_{d}")
-            solver_model.Add(z[m, d] == 2 * w[m, d] + is_odd[m, d])
+            if not live[m][d]:
+                continue
+            is_odd[m][d] = solver_model.NewBoolVar(f"odd_{m}_{d}")
+            solver_model.AddAllowedAssignments(
+                [x[m][d], is_odd[m][d]],
+                [(v, (v // step) & 1) for v in range(0, x_ub[m][d] + 1, step)])
 
     # tardiness[m] = pares no completados del modelo m
-    tardiness = {}
-    for m, model in enumerate(models):
-        tardiness[m] = solver_model.NewIntVar(
-            0, model["total_producir"], f"tard_{m}"
-        )
-
-    # Variables auxiliares para balanceo: carga por dia en segundos
-    max_load = solver_model.NewIntVar(0, 10_000_000, "max_load")
-    min_load = solver_model.NewIntVar(0, 10_000_000, "min_load")
+    # Cota inferior: lo que no cabe aunque cada dia produzca su maximo
+    tardiness = []
+    for m in range(num_models):
+        max_week = sum(x_ub[m])
+        tardiness.append(solver_model.NewIntVar(
+            max(0, total_prod[m] - max_week), total_prod[m], f"tard_{m}"))
 
     # Variables de consolidacion: span = ultimo_dia - primer_dia de produccion
     # Un span bajo = modelo concentrado en dias consecutivos -> ensamble tiene buffer
-    first_day = {}
-    last_day = {}
-    span = {}
+    first_day = [None] * num_models
+    last_day = [None] * num_models
+    span = [None] * num_models
     for m in range(num_models):
         first_day[m] = solver_model.NewIntVar(0, num_days - 1, f"fd_{m}")
         last_day[m] = solver_model.NewIntVar(0, num_days - 1, f"ld_{m}")
         span[m] = solver_model.NewIntVar(0, num_days - 1, f"sp_{m}")
         for d in range(num_days):
+            if not live[m][d]:
+                continue
             # Si se produce en dia d, primer dia no puede ser despues de d
-            solver_model.Add(first_day[m] <= d).OnlyEnforceIf(y[m, d])
+            solver_model.Add(first_day[m] <= d).OnlyEnforceIf(y[m][d])
             # Si se produce en dia d, ultimo dia no puede ser antes de d
-            solver_model.Add(last_day[m] >= d).OnlyEnforceIf(y[m, d])
+            solver_model.Add(last_day[m] >= d).OnlyEnforceIf(y[m][d])
         # span >= last - first (minimizacion lo empuja al valor exacto)
         solver_model.Add(span[m] >= last_day[m] - first_day[m])
 
     # --- Restricciones ---
 
     # 1. Completar volumen (o registrar tardiness)
-    for m, model in enumerate(models):
-        total_produced = sum(x[m, d] for d in range(num_days))
-        solver_model.Add(total_produced + tardiness[m] == model["total_producir"])
+    for m in range(num_models):
+        total_produced = cp_model.LinearExpr.Sum([x[m][d] for d in range(num_days)])
+        solver_model.Add(total_produced + tardiness[m] == total_prod[m])
 
     # 2. Lote minimo: si se produce, al menos min_lot pares (redondeado a multiplo de step)
+    min_lots = []
     for m, model in enumerate(models):
         # Override de lote minimo por modelo (LOTE_MINIMO_CUSTOM)
         modelo_num = model.get("modelo_num", "")
         model_min = min_lot
         if compiled and modelo_num in compiled.lot_min_overrides:
             model_min = compiled.lot_min_overrides[modelo_num]
-        effective_min = min(model_min, model["total_producir"])
+        effective_min = min(model_min, total_prod[m])
         effective_min = (effective_min // step) * step  # redondear al multiplo de step
+        min_lots.append(effective_min)
         for d in range(num_days):
-            # x[m,d] <= total_producir * y[m,d]  (si y=0, x=0)
-            solver_model.Add(x[m, d] <= model["total_producir"] * y[m, d])
-            # x[m,d] >= effective_min * y[m,d]  (si y=1, x >= minimo)
-            solver_model.Add(x[m, d] >= effective_min * y[m, d])
+            if not live[m][d]:
+                continue
+            # Channeling con literales en vez de big-M:
+            # si y=0, x=0
+            solver_model.Add(x[m][d] == 0).OnlyEnforceIf(y[m][d].Not())
+            # si y=1, x >= minimo
+            if effective_min > 0:
+                solver_model.Add(x[m][d] >= effective_min).OnlyEnforceIf(y[m][d])
 
     # 2b. Restricciones dinamicas: day availability, frozen days, secuencias
     if compiled:
         _apply_compiled_constraints(solver_model, x, y, models, days, compiled)
 
+    # 2c. Romper simetria entre modelos identicos (mismo modelo_num en varios
+    #     colores con igual volumen): intercambiarlos da el mismo objetivo.
+    #     Anclar x[m1][0] >= x[m2][0] descarta la mitad espejo del arbol.
+    #     Los dias NO son intercambiables (span, desempate temprano y
+    #     restricciones por indice de dia dependen del orden).
+    for m1, m2 in _identical_model_pairs(models, total_prod, adjusted_sec, compiled):
+        solver_model.Add(x[m1][0] >= x[m2][0])
+
     # 3. Capacidad por dia con overtime flexible
     #    Tier 1 (regular): plantilla * minutes * 60 (sin costo extra)
     #    Tier 2 (overtime): plantilla_ot * minutes_ot * 60 (penalizado)
-    #    day_load <= regular_cap + overtime_cap (hard limit)
-    #    overtime_used[d] >= day_load - regular_cap (soft, penalizado)
-    day_loads = {}
-    overtime_used = {}
-    regular_caps = {}
-    overtime_caps = {}
-    # Factor de eficiencia: contiguidad, comida y cascade overhead reducen capacidad.
-    # Con multi-HC y mas modelos por dia, hay mas overhead de cascada.
-    EFF = 0.85
+    #    day_load[d] in [0, regular_cap + overtime_cap] (hard limit via dominio)
+    #    overtime_used[d] >= day_load[d] - regular_cap (soft, penalizado)
+    #    La carga se materializa una vez como IntVar y se reutiliza en
+    #    overtime, balance y resumen (la suma ponderada se emite una sola vez).
+    day_loads = [None] * num_days
+    overtime_used = [None] * num_days
     for d in range(num_days):
-        day_cfg = days[d]
-        regular_cap = int(day_cfg["plantilla"] * day_cfg["minutes"] * 60 * EFF)
-        ot_minutes = day_cfg.get("minutes_ot", 0)
-        ot_plantilla = day_cfg.get("plantilla_ot", day_cfg["plantilla"])
-        overtime_cap = int(ot_plantilla * ot_minutes * 60 * EFF)
-
-        regular_caps[d] = regular_cap
-        overtime_caps[d] = overtime_cap
-
-        load_terms = []
-        for m, model in enumerate(models):
-            sec_per_pair = adjusted_sec[m]
-            load_terms.append(x[m, d] * sec_per_pair)
-
-        day_load = sum(load_terms)
-        day_loads[d] = day_load
+        regular_cap = regular_caps[d]
+        overtime_cap = overtime_caps[d]
 
-        # Hard limit: no exceder regular + overtime (con factor eficiencia)
-        solver_model.Add(day_load <= regular_cap + overtime_cap)
+        day_loads[d] = solver_model.NewIntVar(
+            0, regular_cap + overtime_cap, f"dl_{d}")
+        solver_model.Add(
+            cp_model.LinearExpr.WeightedSum(
+                [x[m][d] for m in range(num_models)], adjusted_sec)
+            == day_loads[d])
 
         # Overtime usado (se minimiza via penalizacion)
         overtime_used[d] = solver_model.NewIntVar(0, overtime_cap, f"ot_{d}")
-        solver_model.Add(overtime_used[d] >= day_load - regular_cap)
+        solver_model.Add(overtime_used[d] >= day_loads[d] - regular_cap)
 
     # Pre-computar carga por recurso para cada modelo (excluir MAQUILA)
     # Usado por constraints 3b (resource_cap) y 3c (operator_capacity)
@@ -213,6 +463,15 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
                 continue  # MAQUILA es trabajo externo
             rload[r] = rload.get(r, 0) + op["sec_per_pair"]
         model_resource_load.append(rload)
+    # Invertido por recurso: {recurso: ([m], [seg/par])} solo con carga > 0,
+    # para no recorrer todos los modelos en cada (dia, recurso)
+    resource_models = {}
+    for m, rload in enumerate(model_resource_load):
+        for r, load_sec in rload.items():
+            if load_sec > 0:
+                ms, secs = resource_models.setdefault(r, ([], []))
+                ms.append(m)
+                secs.append(load_sec)
 
     # 3b. Capacidad por tipo de recurso por dia
     #     El diario enforza limites por recurso (MESA, PLANA, ROBOT, etc).
@@ -220,18 +479,16 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
     resource_cap = params.get("resource_capacity", {})
     if resource_cap:
         for d in range(num_days):
-            day_minutes = days[d]["minutes"] + days[d].get("minutes_ot", 0)
+            day_minutes = day_minutes_all[d]
             for res_type, cap in resource_cap.items():
                 if res_type == "ROBOT":
                     continue  # robot ops use specific machine names, not "ROBOT" type
-                terms = []
-                for m in range(num_models):
-                    load_sec = model_resource_load[m].get(res_type, 0)
-                    if load_sec > 0:
-                        terms.append(x[m, d] * load_sec)
-                if terms:
+                if res_type in resource_models:
+                    ms, coeffs = resource_models[res_type]
+                    terms = [x[m][d] for m in ms]
                     solver_model.Add(
-                        sum(terms) <= cap * day_minutes * 60
+                        cp_model.LinearExpr.WeightedSum(terms, coeffs)
+                        <= cap * day_minutes * 60
                     )
 
     # NOTE: Robot-level constraints removed from weekly solver.
@@ -245,129 +502,86 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
     op_capacity = params.get("operator_capacity", {})
     if op_capacity and model_resource_load:
         for d in range(num_days):
-            day_minutes = days[d]["minutes"] + days[d].get("minutes_ot", 0)
+            day_minutes = day_minutes_all[d]
             for res_type, op_count in op_capacity.items():
-                terms = []
-                for m in range(num_models):
-                    load_sec = model_resource_load[m].get(res_type, 0)
-                    if load_sec > 0:
-                        terms.append(x[m, d] * load_sec)
-                if terms:
+                if res_type in resource_models:
+                    ms, coeffs = resource_models[res_type]
+                    terms = [x[m][d] for m in ms]
                     max_sec = op_count * day_minutes * 60
-                    solver_model.Add(sum(terms) <= max_sec)
+                    solver_model.Add(
+                        cp_model.LinearExpr.WeightedSum(terms, coeffs) <= max_sec)
                     if d == 0:
                         print(f"    [OP_CAP] {res_type}: {op_count} operarios, "
                               f"max={max_sec}s/dia ({day_minutes}min)")
 
-    # 4. Throughput maximo por modelo/dia: considera el cuello de botella Y la
-    #    profundidad de cascada. En el diario, las operaciones corren en cascada
-    #    (frac 1 antes que frac 2, etc.), asi que un modelo con 13 fracciones
-    #    necesita mas bloques que uno con 3. Cada paso de cascada consume ~0.5
-    #    bloques de startup (con multi-HC del diario, las ops manuales terminan
-    #    mas rapido y la pipeline avanza).
-
-    for m, model in enumerate(models):
-        ops = [op for op in model.get("operations", []) if op.get("recurso") != "MAQUILA"]
-        if ops:
-            bottleneck_op = min(ops, key=lambda op: op.get("rate", 999))
-            bottleneck_rate = bottleneck_op.get("rate", 100)
-        else:
-            n_ops = model.get("num_ops", 1)
-            avg_sec = model["total_sec_per_pair"] / max(n_ops, 1)
-            bottleneck_rate = 3600 / avg_sec if avg_sec > 0 else 100
-
-        num_ops = len(ops)
-        # HC boost for manual bottlenecks (MESA/GENERAL): multiple people can work
-        # the same operation, effectively multiplying the bottleneck rate.
-        # Robots always HC=1, but MESA ops get HC=2-3 in the daily solver.
-        bottleneck_recurso = bottleneck_op.get("recurso", "GENERAL") if ops else "GENERAL"
-        if bottleneck_recurso in ("MESA", "GENERAL", None, ""):
-            # Conservative HC boost: daily solver typically assigns HC=2-3 for MESA
-            avg_plantilla = sum(d["plantilla"] for d in days) / max(len(days), 1)
-            hc_boost = max(2.0, min(4.0, avg_plantilla / max(1, num_models)))
-        else:
-            hc_boost = 1.0
-
-        for d in range(num_days):
-            day_minutes = days[d]["minutes"]
-            # Usar solo minutos regulares para throughput per-model.
-            # Overtime agrega capacidad total pero NO extiende la ventana
-            # de cascada (un modelo compartiendo el dia con otros no puede
-            # usar los bloques de overtime si los regulares estan ocupados).
-            block_duration = 60
-            total_blocks = day_minutes / block_duration
-            # Cascade penalty: more conservative (0.15 vs 0.3) — the daily solver
-            # can parallelize across robots, so cascade overhead is smaller than
-            # assumed. For ROBOT-bottleneck models, parallelism across multiple
-            # machine instances further reduces the effective startup cost.
-            cascade_mult = 0.15 if bottleneck_recurso not in ("MESA", "GENERAL", None, "") else 0.30
-            cascade_startup = (num_ops - 1) * cascade_mult
-            effective_blocks = max(1, total_blocks - cascade_startup)
-            cascade_eff = effective_blocks / total_blocks if total_blocks > 0 else 1
-            # Factor 0.90: the daily solver handles physical machine constraints,
-            # so the weekly just needs a light cap to avoid wild overestimation.
-            # Was 0.70 — too aggressive, caused tardiness on isolated models.
-            throughput_factor = 0.90
-            raw_throughput = bottleneck_rate * hc_boost * day_minutes / 60 * cascade_eff * throughput_factor
-            # Round to nearest step (not floor) to avoid losing capacity to truncation.
-            max_throughput = int(round(raw_throughput / step)) * step
-            max_throughput = max(max_throughput, step)  # never round to 0
-            max_throughput = min(max_throughput, model["total_producir"])
-            solver_model.Add(x[m, d] <= max_throughput)
-            if d == 0:  # solo imprimir para el primer dia
-                print(f"    [THROUGHPUT] {model.get('modelo_num','?')}: "
-                      f"bottleneck={bottleneck_rate}, hc_boost={hc_boost:.1f}, "
-                      f"ops={num_ops}, factor={throughput_factor:.2f}, "
-                      f"minutes={day_minutes}, cascade_eff={cascade_eff:.2f}, "
-                      f"max_throughput={max_throughput}")
-
     # 5. Balanceo: rastrear carga maxima y minima entre dias normales
-    normal_day_indices = [d for d in range(num_days) if not days[d]["is_saturday"]]
-    for d in normal_day_indices:
-        solver_model.Add(max_load >= day_loads[d])
-        solver_model.Add(min_load <= day_loads[d])
-
-    # 5b. Balance directo sobre pares por dia (no solo segundos)
-    total_volume = sum(model["total_producir"] for model in models)
-    max_pares = solver_model.NewIntVar(0, total_volume, "max_pares")
-    min_pares = solver_model.NewIntVar(0, total_volume, "min_pares")
-    for d in normal_day_indices:
-        day_pares = sum(x[m, d] for m in range(num_models))
-        solver_model.Add(max_pares >= day_pares)
-        solver_model.Add(min_pares <= day_pares)
+    #    Con menos de 2 dias normales no hay desbalance posible: se omite.
+    has_balance = len(normal_day_indices) >= 2
+    if has_balance:
+        # Carga por dia (segundos, ya materializada) para max/min exactos
+        load_vars = [day_loads[d] for d in normal_day_indices]
+        load_ub = max(regular_caps[d] + overtime_caps[d] for d in normal_day_indices)
+        max_load = solver_model.NewIntVar(0, load_ub, "max_load")
+        min_load = solver_model.NewIntVar(0, load_ub, "min_load")
+        solver_model.AddMaxEquality(max_load, load_vars)
+        solver_model.AddMinEquality(min_load, load_vars)
+
+        # 5b. Balance directo sobre pares por dia (no solo segundos)
+        total_volume = sum(total_prod)
+        pares_vars = []
+        for d in normal_day_indices:
+            pv = solver_model.NewIntVar(0, total_volume, f"dp_{d}")
+            solver_model.Add(
+                pv == cp_model.LinearExpr.Sum([x[m][d] for m in range(num_models)]))
+            pares_vars.append(pv)
+        max_pares = solver_model.NewIntVar(0, total_volume, "max_pares")
+        min_pares = solver_model.NewIntVar(0, total_volume, "min_pares")
+        solver_model.AddMaxEquality(max_pares, pares_vars)
+        solver_model.AddMinEquality(min_pares, pares_vars)
 
     # --- Funcion Objetivo ---
 
-    obj_terms = []
+    # Objetivo como una sola suma ponderada: pares (variable, peso) planos
+    obj_vars = []
+    obj_w = []
 
     # Minimizar pares no completados (maxima prioridad, con peso por modelo)
+    tard_weights = []
     for m in range(num_models):
         weight = W_TARDINESS
         if compiled:
             modelo_num = models[m].get("modelo_num", "")
             multiplier = compiled.tardiness_weights.get(modelo_num, 1.0)
             weight = int(W_TARDINESS * multiplier)
-        obj_terms.append(weight * tardiness[m])
+        tard_weights.append(weight)
+        obj_vars.append(tardiness[m])
+        obj_w.append(weight)
 
-    # Penalizar produccion en sabado
-    saturday_indices = [d for d in range(num_days) if days[d]["is_saturday"]]
+    # Penalizar produccion en sabado (solo celdas donde puede haber produccion)
     for d in saturday_indices:
         for m in range(num_models):
-            obj_terms.append(W_SATURDAY * x[m, d] * adjusted_sec[m])
+            if adjusted_sec[m] <= 0 or x_ub[m][d] <= 0:
+                continue
+            obj_vars.append(x[m][d])
+            obj_w.append(W_SATURDAY * adjusted_sec[m])
 
     # Penalizar dispersion de modelos (consolidar en dias consecutivos)
     # Pespunte alimenta ensamble: modelos desperdigados = ensamble sin buffer
     for m in range(num_models):
-        obj_terms.append(W_SPAN * span[m])
+        obj_vars.append(span[m])
+        obj_w.append(W_SPAN)
 
     # Penalizar cambios de modelo (menos modelos distintos por dia = mejor)
     for d in range(num_days):
         for m in range(num_models):
-            obj_terms.append(W_CHANGEOVER * y[m, d])
+            if live[m][d]:
+                obj_vars.append(y[m][d])
+                obj_w.append(W_CHANGEOVER)
 
     # Penalizar overtime (horas extra solo cuando se necesitan)
     for d in range(num_days):
-        obj_terms.append(W_OVERTIME * overtime_used[d])
+        obj_vars.append(overtime_used[d])
+        obj_w.append(W_OVERTIME)
 
     # Hard constraint: limitar modelos y operaciones concurrentes por dia.
     # El diario usa cascada (precedencia entre fracciones), lo que limita
@@ -375,22 +589,28 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
     # Con 10 bloques y cascada, 3-4 modelos es el maximo practico.
     for d in range(num_days):
         # Limite de modelos activos por dia (hard)
-        plantilla_d = days[d]["plantilla"]
+        plantilla_d = plantilla[d]
         max_models_day = max(3, plantilla_d // 3)  # con plantilla 19 → 6 modelos, aprovecha todo el HC
-        solver_model.Add(sum(y[m, d] for m in range(num_models)) <= max_models_day)
+        solver_model.Add(
+            cp_model.LinearExpr.Sum([y[m][d] for m in range(num_models)]) <= max_models_day)
 
-        # Limite de operaciones totales por dia
-        total_ops_day = []
-        for m in range(num_models):
-            n_ops = models[m].get("num_ops", 1)
-            total_ops_day.append(y[m, d] * n_ops)
-        max_ops = plantilla_d * 3  # con multi-HC, mas ops pueden correr a la vez
-        solver_model.Add(sum(total_ops_day) <= max_ops)
+        # Limite de operaciones totales por dia (con multi-HC, mas ops pueden
+        # correr a la vez). Se omite si ni con todos los modelos se alcanza.
+        if max_ops_factor is None:
+            continue
+        max_ops = plantilla_d * max_ops_factor
+        live_ms = [m for m in range(num_models) if live[m][d]]
+        if sum(num_ops_list[m] for m in live_ms) > max_ops:
+            solver_model.Add(cp_model.LinearExpr.WeightedSum(
+                [y[m][d] for m in live_ms],
+                [num_ops_list[m] for m in live_ms]) <= max_ops)
 
     # Penalizar lotes no multiplo de 100 (preferir centenas cerradas)
     for d in range(num_days):
         for m in range(num_models):
-            obj_terms.append(W_ODD_LOT * is_odd[m, d])
+            if live[m][d]:
+                obj_vars.append(is_odd[m][d])
+                obj_w.append(W_ODD_LOT)
 
     # Penalizar lotes pequeños: si un modelo se programa un dia, preferir lotes
     # grandes. Un lote de 100 pares tiene startup de cascada similar a uno de 400
@@ -400,30 +620,36 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
     W_SMALL_LOT = 1_500  # penalty por cada dia-modelo con lote chico (permite splitting moderado)
     for d in range(num_days):
         for m in range(num_models):
-            # Penalty escalonado: lotes < 200 pares (z < 4 batches) reciben penalty extra
+            if not live[m][d]:
+                continue
+            # Penalty escalonado: lotes < 4 batches (x < 4*step) reciben penalty extra
             is_small = solver_model.NewBoolVar(f"small_{m}_{d}")
-            # small=1 si el modelo esta activo (y=1) y produce < 200 pares (z < 4)
-            # z[m,d] < 4 AND y[m,d] = 1 → is_small = 1
-            solver_model.Add(z[m, d] <= 3).OnlyEnforceIf(is_small)
-            solver_model.Add(z[m, d] >= 4).OnlyEnforceIf(is_small.Not())
+            # small=1 si el modelo esta activo (y=1) y produce < 4 batches
+            # x[m,d] <= 3*step AND y[m,d] = 1 → is_small = 1
+            solver_model.Add(x[m][d] <= 3 * step).OnlyEnforceIf(is_small)
+            solver_model.Add(x[m][d] >= 4 * step).OnlyEnforceIf(is_small.Not())
             # Solo penalizar si esta activo: is_small AND y
             small_and_active = solver_model.NewBoolVar(f"sa_{m}_{d}")
-            solver_model.AddBoolAnd([is_small, y[m, d]]).OnlyEnforceIf(small_and_active)
-            solver_model.AddBoolOr([is_small.Not(), y[m, d].Not()]).OnlyEnforceIf(small_and_active.Not())
-            obj_terms.append(W_SMALL_LOT * small_and_active)
+            solver_model.AddBoolAnd([is_small, y[m][d]]).OnlyEnforceIf(small_and_active)
+            solver_model.AddBoolOr([is_small.Not(), y[m][d].Not()]).OnlyEnforceIf(small_and_active.Not())
+            obj_vars.append(small_and_active)
+            obj_w.append(W_SMALL_LOT)
 
-    # Minimizar desbalance (diferencia max-min de carga en dias normales)
-    obj_terms.append(W_BALANCE * (max_load - min_load))
+    if has_balance:
+        # Minimizar desbalance (diferencia max-min de carga en dias normales)
+        obj_vars.extend([max_load, min_load])
+        obj_w.extend([W_BALANCE, -W_BALANCE])
 
-    # Balance directo sobre pares por dia
-    obj_terms.append(W_PARES_BALANCE * (max_pares - min_pares))
+        # Balance directo sobre pares por dia
+        obj_vars.extend([max_pares, min_pares])
+        obj_w.extend([W_PARES_BALANCE, -W_PARES_BALANCE])
 
     # Preferir produccion en dias tempranos (desempate)
     # Lun=5, Mar=10, Mie=15, Jue=20, Vie=25: insignificante vs W_TARDINESS(100k)
-    for d in range(num_days):
-        if not days[d]["is_saturday"]:
-            for m in range(num_models):
-                obj_terms.append(W_EARLY * x[m, d] * (d + 1))
+    for d in normal_day_indices:
+        for m in range(num_models):
+            obj_vars.append(x[m][d])
+            obj_w.append(W_EARLY * (d + 1))
 
     # Bonificacion por afinidad de robots: modelos que comparten un robot fisico
     # se benefician de estar en el mismo dia (el robot se usa todo el dia en vez
@@ -445,67 +671,152 @@ def optimize(models: list, params: dict, compiled=None) -> tuple:
 
     for m1, m2, n_shared in robot_pairs:
         for d in range(num_days):
+            if not (live[m1][d] and live[m2][d]):
+                continue
             # both[m1,m2,d] = 1 si ambos modelos producen en dia d
             both = solver_model.NewBoolVar(f"both_{m1}_{m2}_{d}")
-            solver_model.AddBoolAnd([y[m1, d], y[m2, d]]).OnlyEnforceIf(both)
-            solver_model.AddBoolOr([y[m1, d].Not(), y[m2, d].Not()]).OnlyEnforceIf(both.Not())
+            solver_model.AddBoolAnd([y[m1][d], y[m2][d]]).OnlyEnforceIf(both)
+            solver_model.AddBoolOr([y[m1][d].Not(), y[m2][d].Not()]).OnlyEnforceIf(both.Not())
             # Bonus: reducir costo cuando comparten dia (negativo = beneficio)
-            obj_terms.append(-W_ROBOT_AFFINITY * n_shared * both)
+            obj_vars.append(both)
+            obj_w.append(-W_ROBOT_AFFINITY * n_shared)
 
     if robot_pairs:
         print(f"    [AFFINITY] {len(robot_pairs)} pares de modelos con robots compartidos")
 
-    solver_model.Minimize(sum(obj_terms))
+    tard_expr = cp_model.LinearExpr.WeightedSum(tardiness, tard_weights)
 
-    # --- Resolver ---
+    return solver_model, {
+        "x": x, "y": y, "is_odd": is_odd, "tardiness": tardiness,
+        "span": span, "day_loads": day_loads, "overtime_used": overtime_used,
+        "tard_expr": tard_expr, "obj_vars": obj_vars, "obj_w": obj_w,
+        "step": step, "total_prod": total_prod,
+        "adjusted_sec": adjusted_sec, "regular_caps": regular_caps,
+        "overtime_caps": overtime_caps, "x_ub": x_ub, "cap_ub": cap_ub,
+        "min_lots": min_lots,
+    }
 
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 30
-    solver.parameters.num_workers = 8
-    status = solver.Solve(solver_model)
 
-    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        raise RuntimeError(
-            f"No se encontro solucion factible. Estado: {solver.StatusName(status)}"
-        )
+def _identical_model_pairs(models, total_prod, load_sec, compiled):
+    """Pares consecutivos (m1, m2) de modelos intercambiables en el modelo CP-SAT.
 
-    # --- Extraer solucion ---
+    Dos modelos son intercambiables si comparten modelo_num (mismas reglas
+    del compilado), volumen, carga, operaciones y robots, y ninguno aparece
+    en secuencias o agrupaciones (que referencian indices concretos).
+    """
+    pinned = set()
+    if compiled:
+        for a, b in list(compiled.sequences) + list(compiled.model_groups):
+            pinned.update((a, b))
 
-    schedule = _extract_schedule(solver, x, models, days)
-    summary = _build_summary(solver, x, y, tardiness, span, day_loads, overtime_used,
-                             regular_caps, overtime_caps, models, days, status)
+    groups = {}
+    for m, model in enumerate(models):
+        if m in pinned:
+            continue
+        ops_sig = tuple(
+            (op.get("fraccion", 0), op.get("recurso"), op.get("sec_per_pair", 0))
+            for op in model.get("operations", [])
+        )
+        key = (model.get("modelo_num", ""), total_prod[m], load_sec[m],
+               model.get("num_ops", 1), tuple(sorted(model.get("robots_used", []))),
+               ops_sig)
+        groups.setdefault(key, []).append(m)
 
-    return schedule, summary
+    pairs = []
+    for members in groups.values():
+        for i in range(len(members) - 1):
+            pairs.append((members[i], members[i + 1]))
+    return pairs
 
 
-def _extract_schedule(solver, x, models, days):
-    """Extrae asignaciones de pares por modelo y dia."""
-    num_days = len(days)
-    schedule = []
+def _make_solver(max_time_s, params=None):
+    """CpSolver con el preset SOLVER_PARAMS y limite de tiempo.
 
-    for m, model in enumerate(models):
-        for d in range(num_days):
-            pares = solver.Value(x[m, d])
-            if pares <= 0:
+    params (opcional): num_workers, solver_params y debug sobreescriben el preset.
+    """
+    params = params or {}
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time_s
+    overrides = dict(params.get("solver_params", {}))
+    if params.get("num_workers"):
+        overrides.setdefault("num_workers", params["num_workers"])
+    for name, value in {**SOLVER_PARAMS, **overrides}.items():
+        setattr(solver.parameters, name, value)
+    if SOLVER_LOG or params.get("debug"):
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = lambda line: print(f"    [CP-SAT] {line}")
+    return solver
+
+
+def _solution_values(solver, variables):
+    """Valores de una lista de variables como array int64 (una lectura de la respuesta)."""
+    solution = solver.ResponseProto().solution
+    return np.fromiter((solution[v.Index()] for v in variables),
+                       dtype=np.int64, count=len(variables))
+
+
+def _greedy_schedule(total_prod, load_sec, regular_caps, x_ub, min_lots,
+                     days, step):
+    """Heuristica LPT para warm start: {(m, d): pares}.
+
+    Ordena modelos por carga total descendente (longest processing time) y
+    los empaca dia por dia (normales primero, sabado al final) en multiplos
+    de step, respetando capacidad regular, cota x_ub y lote minimo. Los dias
+    bloqueados ya vienen en 0 en x_ub. No tiene que ser factible: solo
+    orienta la busqueda inicial.
+    """
+    num_days = len(days)
+    day_order = ([d for d in range(num_days) if not days[d]["is_saturday"]]
+                 + [d for d in range(num_days) if days[d]["is_saturday"]])
+    remaining_cap = list(regular_caps)
+    order = sorted(range(len(total_prod)),
+                   key=lambda m: -total_prod[m] * load_sec[m])
+
+    greedy = {}
+    for m in order:
+        pending = total_prod[m]
+        for d in day_order:
+            if pending <= 0:
+                break
+            fit = remaining_cap[d] // load_sec[m] if load_sec[m] > 0 else pending
+            pares = min(pending, x_ub[m][d], (fit // step) * step)
+            if pares <= 0 or pares < min_lots[m]:
                 continue
-
-            day_cfg = days[d]
-            sec_total = pares * model["total_sec_per_pair"]
-            hours_work = sec_total / 3600.0
-            # Headcount fraccionario: horas de trabajo / horas del dia
-            hours_day = day_cfg["minutes"] / 60.0
-            headcount = hours_work / hours_day if hours_day > 0 else 0
-
-            schedule.append({
-                "Dia": day_cfg["name"],
-                "Fabrica": model["fabrica"],
-                "Modelo": model["codigo"],
-                "Suela": model["suela"],
-                "Pares": pares,
-                "HC_Necesario": round(headcount, 1),
-                "Horas_Trabajo": round(hours_work, 1),
-                "Num_Operaciones": model["num_ops"],
-            })
+            greedy[m, d] = pares
+            pending -= pares
+            remaining_cap[d] -= pares * load_sec[m]
+    return greedy
+
+
+def _extract_schedule(X, models, days):
+    """Extrae asignaciones de pares por modelo y dia (X = valores de x[m][d])."""
+    # Horas y headcount en una sola pasada vectorizada sobre la matriz completa
+    sec_per_pair = np.array([model["total_sec_per_pair"] for model in models],
+                            dtype=np.float64)
+    hours_day = np.array([day_cfg["minutes"] / 60.0 for day_cfg in days],
+                         dtype=np.float64)
+    hours_work = X * sec_per_pair[:, None] / 3600.0
+    # Headcount fraccionario: horas de trabajo / horas del dia
+    headcount = np.divide(hours_work, hours_day[None, :],
+                          out=np.zeros_like(hours_work),
+                          where=hours_day[None, :] > 0)
+
+    # Solo recorrer celdas con produccion (orden m, d como antes)
+    schedule = []
+    rows, cols = np.nonzero(X > 0)
+    for m, d in zip(rows.tolist(), cols.tolist()):
+        model = models[m]
+        schedule.append({
+            "Dia": days[d]["name"],
+            "Fabrica": model["fabrica"],
+            "Modelo": model["codigo"],
+            "Suela": model["suela"],
+            "Pares": int(X[m, d]),
+            "HC_Necesario": round(float(headcount[m, d]), 1),
+            "Horas_Trabajo": round(float(hours_work[m, d]), 1),
+            "Num_Operaciones": model["num_ops"],
+        })
 
     # Ordenar por dia, fabrica, modelo
     day_order = {days[d]["name"]: d for d in range(len(days))}
@@ -514,24 +825,27 @@ def _extract_schedule(solver, x, models, days):
     return schedule
 
 
-def _build_summary(solver, x, y, tardiness, span, day_loads, overtime_used,
+def _build_summary(solver, X, Y, T, span, day_loads, overtime_used,
                     regular_caps, overtime_caps, models, days, status):
-    """Construye resumen de metricas."""
+    """Construye resumen de metricas (X, Y, T = valores de x, y, tardiness)."""
     num_days = len(days)
     num_models = len(models)
+    loads = _solution_values(solver, day_loads).tolist()
+    ot_used = _solution_values(solver, overtime_used).tolist()
+    spans = _solution_values(solver, span).tolist()
 
     # Metricas por dia
     days_summary = []
     for d in range(num_days):
         day_cfg = days[d]
-        total_pares = sum(solver.Value(x[m, d]) for m in range(num_models))
-        load_sec = solver.Value(day_loads[d])
+        total_pares = int(X[:, d].sum())
+        load_sec = loads[d]
         regular_cap = regular_caps[d]
         overtime_cap = overtime_caps[d]
         total_cap = regular_cap + overtime_cap
         utilization = (load_sec / regular_cap * 100) if regular_cap > 0 else 0
 
-        ot_sec = solver.Value(overtime_used[d])
+        ot_sec = ot_used[d]
         ot_hours = ot_sec / 3600.0
 
         # Headcount necesario (basado en horas regulares del dia)
@@ -542,7 +856,7 @@ def _build_summary(solver, x, y, tardiness, span, day_loads, overtime_used,
         # Peak HC: total operaciones concurrentes si todos los modelos activos se traslapan
         peak_hc = sum(
             models[m].get("num_ops", 1) for m in range(num_models)
-            if solver.Value(y[m, d]) > 0
+            if Y[m, d] > 0
         )
 
         days_summary.append({
@@ -560,15 +874,15 @@ def _build_summary(solver, x, y, tardiness, span, day_loads, overtime_used,
     # Metricas por modelo
     models_summary = []
     for m, model in enumerate(models):
-        produced = sum(solver.Value(x[m, d]) for d in range(num_days))
-        tard = solver.Value(tardiness[m])
-        sp = solver.Value(span[m]) if m in span else 0
+        produced = int(X[m].sum())
+        tard = int(T[m])
+        sp = spans[m]
         # Reportar con total redondeado (lo que realmente se produce en planta)
         original_total = model.get("_original_total", model["total_producir"])
         # Dias activos para este modelo
         active_days = [
             days[d]["name"] for d in range(num_days)
-            if solver.Value(x[m, d]) > 0
+            if X[m, d] > 0
         ]
         models_summary.append({
             "codigo": model["codigo"],
@@ -592,19 +906,27 @@ def _build_summary(solver, x, y, tardiness, span, day_loads, overtime_used,
     }
 
 
-def _apply_compiled_constraints(solver_model, x, y, models, days, compiled):
-    """Aplica restricciones dinamicas del CompiledConstraints al modelo CP-SAT."""
+def _blocked_days(models, days, compiled):
+    """Dias prohibidos por modelo segun el compilado: [m] -> set de indices.
+
+    Cubre day availability, entrega de maquila (modelos sin ops internas
+    antes de la maquila), avance (dias ya producidos) y dias congelados.
+    """
     num_days = len(days)
+    blocked = [set() for _ in models]
+    if not compiled:
+        return blocked
+    day_idx = {}  # nombre -> indices (resuelto una vez, sin comparar strings por dia)
+    for d, day_cfg in enumerate(days):
+        day_idx.setdefault(day_cfg["name"], []).append(d)
 
     for m, model in enumerate(models):
         modelo_num = model.get("modelo_num", "")
 
-        # Day availability: forzar x[m,d]=0 para dias no permitidos
+        # Day availability: dias no permitidos
         if modelo_num in compiled.day_availability:
             allowed = compiled.day_availability[modelo_num]
-            for d in range(num_days):
-                if d not in allowed:
-                    solver_model.Add(x[m, d] == 0)
+            blocked[m].update(d for d in range(num_days) if d not in allowed)
 
         # Maquila delivery: no producir post-maquila antes del dia de entrega
         if modelo_num in compiled.maquila_earliest_day:
@@ -622,22 +944,29 @@ def _apply_compiled_constraints(solver_model, x, y, models, days, compiled):
             )
             if not has_pre_maquila_internal:
                 # All internal ops are post-maquila → block entire model before delivery day
-                for d in range(min(earliest, num_days)):
-                    solver_model.Add(x[m, d] == 0)
+                blocked[m].update(range(min(earliest, num_days)))
 
-        # Frozen days (avance): forzar x[m,d]=0 para dias ya producidos
+        # Frozen days (avance): dias ya producidos
         if modelo_num in compiled.avance:
             for day_name, pares_done in compiled.avance[modelo_num].items():
-                for d in range(num_days):
-                    if days[d]["name"] == day_name and pares_done > 0:
-                        solver_model.Add(x[m, d] == 0)
+                if pares_done > 0:
+                    blocked[m].update(day_idx.get(day_name, ()))
 
     # Frozen days (reopt_from_day): no asignar nada a dias congelados
     if compiled.frozen_days:
-        for d in compiled.frozen_days:
-            if d < num_days:
-                for m in range(len(models)):
-                    solver_model.Add(x[m, d] == 0)
+        frozen = {d for d in compiled.frozen_days if d < num_days}
+        for m in range(len(models)):
+            blocked[m].update(frozen)
+    return blocked
+
+
+def _apply_compiled_constraints(solver_model, x, y, models, days, compiled):
+    """Aplica restricciones dinamicas del CompiledConstraints al modelo CP-SAT.
+
+    Los dias prohibidos ya vienen en el dominio de x (_blocked_days); aqui
+    quedan las restricciones entre modelos.
+    """
+    num_days = len(days)
 
     # Secuencias: modelo A debe completarse antes de que B produzca
     for antes_idx, despues_idx in compiled.sequences:
@@ -646,10 +975,10 @@ def _apply_compiled_constraints(solver_model, x, y, models, days, compiled):
             continue
         for d in range(num_days):
             # Si B produce en dia d, A debe tener todo acumulado hasta dia d
-            cum_antes = sum(x[antes_idx, dd] for dd in range(d + 1))
-            solver_model.Add(cum_antes >= total_antes * y[despues_idx, d])
+            cum_antes = cp_model.LinearExpr.Sum(x[antes_idx][:d + 1])
+            solver_model.Add(cum_antes >= total_antes * y[despues_idx][d])
 
     # Agrupacion: modelos A y B deben producirse en los mismos dias
     for idx_a, idx_b in compiled.model_groups:
         for d in range(num_days):
-            solver_model.Add(y[idx_a, d] == y[idx_b, d])
+            solver_model.Add(y[idx_a][d] == y[idx_b][d])
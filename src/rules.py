@@ -13,7 +13,7 @@ de parseo) permanecen aqui.
 
 from __future__ import annotations
 from copy import deepcopy
-from config_manager import load_config
+from config_manager import CONFIG_PATH, load_config
 
 
 # Fallback hardcodeado (solo se usa si no hay horarios en DB)
@@ -108,9 +108,28 @@ RESOURCE_ALIASES = {
 }
 
 
+# Config leida por ultima vez y el mtime de config.json en ese momento
+_config_cache = {"mtime": None, "config": None}
+
+
+def _config_mtime():
+    try:
+        return CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
 def _get_config():
-    """Carga config una vez (cache en modulo no es necesario, JSON es rapido)."""
-    return load_config()
+    """Config de config.json, releida solo si el archivo cambio (mtime).
+
+    El dict es compartido: los getters devuelven copias de lo mutable.
+    """
+    mtime = _config_mtime()
+    if _config_cache["config"] is None or mtime != _config_cache["mtime"]:
+        _config_cache["config"] = load_config()
+        # load_config puede crear/migrar el archivo: tomar el mtime resultante
+        _config_cache["mtime"] = _config_mtime()
+    return _config_cache["config"]
 
 
 # Propiedades que leen de config.json
@@ -121,7 +140,7 @@ def get_resource_capacity():
 
 def get_physical_robots():
     """Retorna lista de robots fisicos desde config."""
-    return _get_config()["robots"]["physical"]
+    return list(_get_config()["robots"]["physical"])
 
 
 # Acceso directo para compatibilidad con codigo existente
@@ -11,10 +11,15 @@ Uso:
 """
 
 import os
-from functools import lru_cache
+import threading
 
 from supabase import create_client, Client
 
+# Cliente unico del proceso; el lock evita que dos hilos (requests
+# concurrentes en el primer uso) creen cada uno su propio cliente
+_client: Client | None = None
+_client_lock = threading.Lock()
+
 
 def _load_credentials() -> tuple[str, str]:
     """Carga URL y key de Supabase desde config.json o env vars."""
@@ -43,13 +48,21 @@ def _load_credentials() -> tuple[str, str]:
     return url, key
 
 
-@lru_cache(maxsize=1)
 def get_client() -> Client:
     """Retorna un cliente Supabase singleton."""
-    url, key = _load_credentials()
-    return create_client(url, key)
+    global _client
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                url, key = _load_credentials()
+                _client = create_client(url, key)
+            client = _client
+    return client
 
 
 def reset_client():
     """Limpia el cache del cliente (util si cambian credenciales)."""
-    get_client.cache_clear()
+    global _client
+    with _client_lock:
+        _client = None
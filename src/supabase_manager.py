@@ -8,6 +8,11 @@ Todas las funciones retornan dicts/listas compatibles con el formato
 que el dashboard y los optimizadores esperan.
 """
 
+import copy
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from supabase_client import get_client
 
 
@@ -31,6 +36,35 @@ def _first(response) -> dict | None:
     return data[0] if data else None
 
 
+# Cache de tablas de configuracion pequenas (pesos, parametros, dias...).
+# El frontend tambien las edita directo en Supabase, asi que ademas de
+# invalidar desde los update_* de este modulo se expira por TTL.
+_CONFIG_CACHE_TTL_S = 60.0
+_config_cache: dict[tuple, tuple[float, object]] = {}
+
+
+def _cached_config(fn):
+    """Memoiza un getter de configuracion por argumentos, con TTL."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        hit = _config_cache.get(key)
+        if hit is None or now - hit[0] >= _CONFIG_CACHE_TTL_S:
+            hit = (now, fn(*args, **kwargs))
+            _config_cache[key] = hit
+        # Copia: los callers pueden mutar el resultado
+        return copy.deepcopy(hit[1])
+    return wrapper
+
+
+def _invalidate_config(name: str):
+    """Descarta las entradas cacheadas de un getter."""
+    for key in list(_config_cache):
+        if key[0] == name:
+            _config_cache.pop(key, None)
+
+
 # ============================================================
 # ROBOTS
 # ============================================================
@@ -53,18 +87,49 @@ def get_robots_by_area(area: str, solo_activos: bool = True) -> list[dict]:
 
 def get_robot_names(solo_activos: bool = True) -> list[str]:
     """Lista solo los nombres de robots (para compatibilidad con rules.py)."""
-    robots = get_robots(solo_activos=solo_activos)
-    return [r["nombre"] for r in robots]
+    return list(_robot_cache_data()["names_active" if solo_activos else "names_all"])
 
 
 def upsert_robot(nombre: str, estado: str = "ACTIVO", area: str = "PESPUNTE") -> dict:
     """Crea o actualiza un robot."""
     data = {"nombre": nombre, "estado": estado, "area": area}
-    return _first(
+    row = _first(
         _sb().table("robots").upsert(data, on_conflict="nombre").execute()
     )
+    _invalidate_robot_cache()
+    return row
+
+
+# Cache de robots ({nombre: id} y listas de nombres en orden); la tabla casi
+# no cambia y los save_* y get_robot_names la consultan en cada llamada.
+_ROBOT_CACHE_TTL_S = 60.0
+_robot_cache = {"ts": 0.0, "data": None}
 
 
+def _robot_cache_data() -> dict:
+    """Retorna {map, names_active, names_all}, refrescando cada _ROBOT_CACHE_TTL_S."""
+    now = time.monotonic()
+    if _robot_cache["data"] is None or now - _robot_cache["ts"] >= _ROBOT_CACHE_TTL_S:
+        robots = get_robots()
+        _robot_cache["data"] = {
+            "map": {r["nombre"]: r["id"] for r in robots},
+            "names_active": [r["nombre"] for r in robots if r["estado"] == "ACTIVO"],
+            "names_all": [r["nombre"] for r in robots],
+        }
+        _robot_cache["ts"] = now
+    return _robot_cache["data"]
+
+
+def _get_robot_map_cached() -> dict[str, str]:
+    """Retorna {nombre: id} de todos los robots (cacheado)."""
+    return _robot_cache_data()["map"]
+
+
+def _invalidate_robot_cache():
+    _robot_cache["data"] = None
+
+
+@_cached_config
 def get_robot_aliases() -> dict[str, str]:
     """Retorna {alias: nombre_canonico}."""
     rows = _rows(
@@ -91,6 +156,7 @@ def get_fabricas() -> list[str]:
 # CAPACIDADES DE RECURSO
 # ============================================================
 
+@_cached_config
 def get_resource_capacity() -> dict[str, int]:
     """Retorna {tipo: pares_hora} compatible con rules.py."""
     rows = _rows(
@@ -104,12 +170,14 @@ def update_resource_capacity(tipo: str, pares_hora: int):
     _sb().table("capacidades_recurso").update(
         {"pares_hora": pares_hora}
     ).eq("tipo", tipo).execute()
+    _invalidate_config("get_resource_capacity")
 
 
 # ============================================================
 # DIAS LABORALES
 # ============================================================
 
+@_cached_config
 def get_dias_laborales() -> list[dict]:
     """Retorna lista de dias compatible con config.days."""
     rows = _rows(
@@ -143,12 +211,14 @@ def update_dia_laboral(nombre: str, **kwargs):
             data[db_key] = kwargs[py_key]
     if data:
         _sb().table("dias_laborales").update(data).eq("nombre", nombre).execute()
+        _invalidate_config("get_dias_laborales")
 
 
 # ============================================================
 # HORARIOS
 # ============================================================
 
+@_cached_config
 def get_horario(tipo: str = "SEMANA") -> dict:
     """Retorna horario (SEMANA o FINSEMANA)."""
     row = _first(
@@ -169,6 +239,7 @@ def get_horario(tipo: str = "SEMANA") -> dict:
 # PESOS Y PARAMETROS
 # ============================================================
 
+@_cached_config
 def get_pesos() -> dict[str, int]:
     """Retorna {nombre: valor} de pesos de priorizacion."""
     rows = _rows(
@@ -181,8 +252,10 @@ def update_peso(nombre: str, valor: int):
     _sb().table("pesos_priorizacion").update(
         {"valor": valor}
     ).eq("nombre", nombre).execute()
+    _invalidate_config("get_pesos")
 
 
+@_cached_config
 def get_optimizer_params() -> dict[str, float]:
     """Retorna {nombre: valor} de parametros del optimizador."""
     rows = _rows(
@@ -195,6 +268,7 @@ def update_optimizer_param(nombre: str, valor: float):
     _sb().table("parametros_optimizacion").update(
         {"valor": valor}
     ).eq("nombre", nombre).execute()
+    _invalidate_config("get_optimizer_params")
 
 
 # ============================================================
@@ -206,35 +280,22 @@ def get_catalogo() -> dict:
     Retorna catalogo en formato compatible con data_manager.py:
     {modelo_num: {codigo_full, alternativas, operations: [...], ...}}
     """
-    modelos = _rows(
-        _sb().table("catalogo_modelos").select("*").execute()
-    )
+    # Join y agregacion a JSON en el servidor (ver migracion 025), leida de
+    # la vista materializada que se refresca solo si el catalogo cambio (026):
+    # una sola llamada devuelve [{modelo..., operations: [{op..., robots: [...]}]}]
+    modelos = _sb().rpc("catalogo_nested_cached").execute().data or []
 
     catalogo = {}
     for m in modelos:
-        modelo_id = m["id"]
         modelo_num = m["modelo_num"]
 
-        # Cargar operaciones
-        ops_rows = _rows(
-            _sb().table("catalogo_operaciones")
-            .select("*, catalogo_operacion_robots(robot_id, robots(nombre))")
-            .eq("modelo_id", modelo_id)
-            .order("fraccion")
-            .execute()
-        )
-
         operations = []
         resource_summary = {}
         robots_used = set()
-        for op in ops_rows:
+        for op in m["operations"]:
             # Extraer robots permitidos
-            robot_names = []
-            for rel in (op.get("catalogo_operacion_robots") or []):
-                rname = rel.get("robots", {}).get("nombre", "")
-                if rname:
-                    robot_names.append(rname)
-                    robots_used.add(rname)
+            robot_names = [r for r in op["robots"] if r]
+            robots_used.update(robot_names)
 
             recurso = op["recurso"]
             resource_summary[recurso] = resource_summary.get(recurso, 0) + 1
@@ -270,55 +331,11 @@ def save_catalogo(catalogo: dict):
     """
     Guarda catalogo completo (reemplaza todo).
     Input: dict en formato data_manager.py.
+    Todo se escribe en una transaccion (save_catalogo_rpc, migracion 029).
     """
-    sb = _sb()
-
-    # Obtener mapa de robots nombre -> id
-    robot_map = {r["nombre"]: r["id"] for r in get_robots()}
-
-    for modelo_num, data in catalogo.items():
-        # Upsert modelo
-        modelo_row = _first(
-            sb.table("catalogo_modelos").upsert({
-                "modelo_num": modelo_num,
-                "codigo_full": data.get("codigo_full", modelo_num),
-                "alternativas": data.get("alternativas", []),
-                "clave_material": data.get("clave_material", ""),
-                "total_sec_per_pair": data.get("total_sec_per_pair", 0),
-                "num_ops": len(data.get("operations", [])),
-            }, on_conflict="modelo_num").execute()
-        )
-        modelo_id = modelo_row["id"]
-
-        # Borrar operaciones viejas (cascade borra catalogo_operacion_robots)
-        sb.table("catalogo_operaciones").delete().eq(
-            "modelo_id", modelo_id
-        ).execute()
-
-        # Insertar operaciones nuevas
-        for op in data.get("operations", []):
-            op_row = _first(
-                sb.table("catalogo_operaciones").insert({
-                    "modelo_id": modelo_id,
-                    "fraccion": op["fraccion"],
-                    "operacion": op["operacion"],
-                    "input_o_proceso": op.get("input_o_proceso", "PRELIMINARES"),
-                    "etapa": op.get("etapa", ""),
-                    "recurso": op["recurso"],
-                    "recurso_raw": op.get("recurso_raw", ""),
-                    "rate": op.get("rate", 0),
-                    "sec_per_pair": op.get("sec_per_pair", 0),
-                }).execute()
-            )
-
-            # Insertar relaciones con robots
-            for robot_name in op.get("robots", []):
-                robot_id = robot_map.get(robot_name)
-                if robot_id:
-                    sb.table("catalogo_operacion_robots").insert({
-                        "operacion_id": op_row["id"],
-                        "robot_id": robot_id,
-                    }).execute()
+    if not catalogo:
+        return
+    _sb().rpc("save_catalogo_rpc", {"p_catalogo": catalogo}).execute()
 
 
 # ============================================================
@@ -355,16 +372,20 @@ def set_modelo_fabrica(fabrica_nombre: str, modelo_nums: list[str]):
     # Borrar asignaciones existentes de esta fabrica
     sb.table("modelo_fabrica").delete().eq("fabrica_id", fab_id).execute()
 
-    # Insertar nuevas
-    for mn in modelo_nums:
-        mod = _first(
-            sb.table("catalogo_modelos").select("id").eq("modelo_num", mn).execute()
-        )
-        if mod:
-            sb.table("modelo_fabrica").insert({
-                "modelo_id": mod["id"],
-                "fabrica_id": fab_id,
-            }).execute()
+    # Insertar nuevas (resolver todos los modelo_num en una sola consulta)
+    if not modelo_nums:
+        return
+    mods = _rows(
+        sb.table("catalogo_modelos").select("id, modelo_num")
+        .in_("modelo_num", modelo_nums).execute()
+    )
+    id_by_num = {m["modelo_num"]: m["id"] for m in mods}
+    rows = [
+        {"modelo_id": id_by_num[mn], "fabrica_id": fab_id}
+        for mn in modelo_nums if mn in id_by_num
+    ]
+    if rows:
+        sb.table("modelo_fabrica").insert(rows).execute()
 
 
 # ============================================================
@@ -373,116 +394,53 @@ def set_modelo_fabrica(fabrica_nombre: str, modelo_nums: list[str]):
 
 def get_operarios() -> list[dict]:
     """Retorna lista de operarios en formato compatible."""
-    sb = _sb()
     rows = _rows(
-        sb.table("operarios")
-        .select("*, fabricas(nombre)")
+        _sb().table("operarios")
+        .select(
+            "*, fabricas(nombre), operario_recursos(recurso),"
+            " operario_robots(robots(nombre)), operario_dias(dia)"
+        )
         .order("nombre")
         .execute()
     )
 
-    result = []
-    for r in rows:
-        op_id = r["id"]
-
-        # Recursos habilitados
-        recursos = _rows(
-            sb.table("operario_recursos")
-            .select("recurso")
-            .eq("operario_id", op_id)
-            .execute()
-        )
-
-        # Robots habilitados
-        robots = _rows(
-            sb.table("operario_robots")
-            .select("robots(nombre)")
-            .eq("operario_id", op_id)
-            .execute()
-        )
-
-        # Dias disponibles
-        dias = _rows(
-            sb.table("operario_dias")
-            .select("dia")
-            .eq("operario_id", op_id)
-            .execute()
-        )
-
-        result.append({
-            "id": op_id,
+    return [
+        {
+            "id": r["id"],
             "nombre": r["nombre"],
-            "fabrica": r.get("fabricas", {}).get("nombre", "") if r.get("fabricas") else "",
-            "recursos_habilitados": [x["recurso"] for x in recursos],
-            "robots_habilitados": [x["robots"]["nombre"] for x in robots],
+            "fabrica": r["fabricas"].get("nombre", "") if r.get("fabricas") else "",
+            "recursos_habilitados": [x["recurso"] for x in r.get("operario_recursos") or []],
+            "robots_habilitados": [x["robots"]["nombre"] for x in r.get("operario_robots") or []],
             "eficiencia": float(r["eficiencia"]),
-            "dias_disponibles": [x["dia"] for x in dias],
+            "dias_disponibles": [x["dia"] for x in r.get("operario_dias") or []],
             "activo": r["activo"],
-        })
-
-    return result
-
-
-def save_operario(operario: dict) -> dict:
-    """Crea o actualiza un operario."""
-    sb = _sb()
-
-    # Buscar fabrica_id
-    fab_id = None
-    if operario.get("fabrica"):
-        fab = _first(
-            sb.table("fabricas").select("id")
-            .eq("nombre", operario["fabrica"]).execute()
-        )
-        fab_id = fab["id"] if fab else None
-
-    # Upsert operario
-    op_data = {
-        "nombre": operario["nombre"],
-        "fabrica_id": fab_id,
-        "eficiencia": operario.get("eficiencia", 1.0),
-        "activo": operario.get("activo", True),
-    }
-
-    if operario.get("id"):
-        # Update existente
-        op_row = _first(
-            sb.table("operarios").update(op_data)
-            .eq("id", operario["id"]).execute()
-        )
-    else:
-        # Insert nuevo
-        op_row = _first(
-            sb.table("operarios").insert(op_data).execute()
-        )
-
-    op_id = op_row["id"]
-
-    # Reemplazar recursos
-    sb.table("operario_recursos").delete().eq("operario_id", op_id).execute()
-    for rec in operario.get("recursos_habilitados", []):
-        sb.table("operario_recursos").insert({
-            "operario_id": op_id, "recurso": rec
-        }).execute()
-
-    # Reemplazar robots
-    sb.table("operario_robots").delete().eq("operario_id", op_id).execute()
-    robot_map = {r["nombre"]: r["id"] for r in get_robots()}
-    for rname in operario.get("robots_habilitados", []):
-        rid = robot_map.get(rname)
-        if rid:
-            sb.table("operario_robots").insert({
-                "operario_id": op_id, "robot_id": rid
-            }).execute()
+        }
+        for r in rows
+    ]
 
-    # Reemplazar dias
-    sb.table("operario_dias").delete().eq("operario_id", op_id).execute()
-    for dia in operario.get("dias_disponibles", []):
-        sb.table("operario_dias").insert({
-            "operario_id": op_id, "dia": dia
-        }).execute()
 
-    return op_row
+def save_operario(operario: dict, robot_map: dict[str, str] | None = None) -> dict:
+    """
+    Crea o actualiza un operario (una transaccion: save_operario_rpc, migracion 029).
+    robot_map {nombre: id} opcional para guardados en lote; si falta se usa el cache.
+    """
+    if robot_map is None:
+        robot_map = _get_robot_map_cached()
+    return _sb().rpc("save_operario_rpc", {
+        "p_operario": {
+            "id": operario.get("id") or None,
+            "nombre": operario["nombre"],
+            "fabrica": operario.get("fabrica") or "",
+            "eficiencia": operario.get("eficiencia", 1.0),
+            "activo": operario.get("activo", True),
+            "recursos_habilitados": list(operario.get("recursos_habilitados", [])),
+            "dias_disponibles": list(operario.get("dias_disponibles", [])),
+        },
+        "p_robot_ids": [
+            robot_map[rname] for rname in operario.get("robots_habilitados", [])
+            if robot_map.get(rname)
+        ],
+    }).execute().data
 
 
 def delete_operario(operario_id: str):
@@ -504,14 +462,15 @@ def get_pedidos_list() -> list[str]:
 
 def get_pedido(nombre: str) -> list[dict]:
     """Carga items de un pedido por nombre."""
+    sb = _sb()
     ped = _first(
-        _sb().table("pedidos").select("id").eq("nombre", nombre).execute()
+        sb.table("pedidos").select("id").eq("nombre", nombre).execute()
     )
     if not ped:
         return []
 
     items = _rows(
-        _sb().table("pedido_items").select("*").eq("pedido_id", ped["id"]).execute()
+        sb.table("pedido_items").select("*").eq("pedido_id", ped["id"]).execute()
     )
     return [
         {
@@ -526,30 +485,20 @@ def get_pedido(nombre: str) -> list[dict]:
 
 
 def save_pedido(nombre: str, items: list[dict]):
-    """Guarda un pedido (reemplaza si existe)."""
-    sb = _sb()
-
-    # Upsert cabecera
-    ped = _first(
-        sb.table("pedidos").upsert(
-            {"nombre": nombre}, on_conflict="nombre"
-        ).execute()
-    )
-    ped_id = ped["id"]
-
-    # Borrar items viejos
-    sb.table("pedido_items").delete().eq("pedido_id", ped_id).execute()
-
-    # Insertar nuevos
-    for it in items:
-        sb.table("pedido_items").insert({
-            "pedido_id": ped_id,
-            "modelo_num": it["modelo"],
-            "color": it.get("color", ""),
-            "clave_material": it.get("clave_material", ""),
-            "fabrica": it.get("fabrica", ""),
-            "volumen": it["volumen"],
-        }).execute()
+    """Guarda un pedido (reemplaza si existe) en una transaccion (save_pedido_rpc, migracion 029)."""
+    _sb().rpc("save_pedido_rpc", {
+        "p_nombre": nombre,
+        "p_items": [
+            {
+                "modelo": it["modelo"],
+                "color": it.get("color", ""),
+                "clave_material": it.get("clave_material", ""),
+                "fabrica": it.get("fabrica", ""),
+                "volumen": it["volumen"],
+            }
+            for it in items
+        ],
+    }).execute()
 
 
 def delete_pedido(nombre: str):
@@ -590,13 +539,11 @@ def save_restriccion(restriccion: dict) -> dict:
         "semana": restriccion.get("semana"),
     }
 
+    # Sin id -> la BD genera uno y el upsert inserta; con id -> actualiza
     if restriccion.get("id"):
-        return _first(
-            sb.table("restricciones").update(data)
-            .eq("id", restriccion["id"]).execute()
-        )
+        data["id"] = restriccion["id"]
     return _first(
-        sb.table("restricciones").insert(data).execute()
+        sb.table("restricciones").upsert(data, on_conflict="id").execute()
     )
 
 
@@ -664,16 +611,15 @@ def save_avance(semana: str, modelos: dict):
     # Borrar detalle viejo
     sb.table("avance_detalle").delete().eq("avance_id", av_id).execute()
 
-    # Insertar detalle nuevo
-    for modelo_num, dias in modelos.items():
-        for dia, pares in dias.items():
-            if pares > 0:
-                sb.table("avance_detalle").insert({
-                    "avance_id": av_id,
-                    "modelo_num": modelo_num,
-                    "dia": dia,
-                    "pares": pares,
-                }).execute()
+    # Insertar detalle nuevo (un solo INSERT multi-fila)
+    detalle = [
+        {"avance_id": av_id, "modelo_num": modelo_num, "dia": dia, "pares": pares}
+        for modelo_num, dias in modelos.items()
+        for dia, pares in dias.items()
+        if pares > 0
+    ]
+    if detalle:
+        sb.table("avance_detalle").insert(detalle).execute()
 
 
 # ============================================================
@@ -692,12 +638,22 @@ def get_resultados_list() -> list[dict]:
 
 
 def get_resultado(nombre: str) -> dict | None:
-    """Carga un resultado completo por nombre."""
+    """Carga un resultado completo por nombre (incluye los JSONB pesados)."""
     return _first(
         _sb().table("resultados").select("*").eq("nombre", nombre).execute()
     )
 
 
+def get_resultado_meta(nombre: str) -> dict | None:
+    """Carga solo cabecera y weekly_summary de un resultado (sin schedule ni daily_results)."""
+    return _first(
+        _sb().table("resultados")
+        .select("id, nombre, base_name, version, nota, fecha_optimizacion, weekly_summary")
+        .eq("nombre", nombre)
+        .execute()
+    )
+
+
 def save_resultado(resultado: dict) -> dict:
     """Guarda un resultado de optimizacion."""
     sb = _sb()
@@ -737,6 +693,11 @@ def delete_resultado(nombre: str):
 # MIGRACION JSON -> SUPABASE
 # ============================================================
 
+# Hilos para las etapas de migracion con filas independientes; el GIL se
+# libera durante el I/O de red, asi que los round trips se solapan.
+_MIGRATION_WORKERS = 8
+
+
 def migrate_from_json():
     """
     Migra datos existentes de JSON local a Supabase.
@@ -764,19 +725,23 @@ def migrate_from_json():
         with open(op_path, "r", encoding="utf-8") as f:
             operarios = json.load(f)
         print(f"  Operarios: {len(operarios)}...")
-        for op in operarios:
-            save_operario(op)
+        robot_map = {r["nombre"]: r["id"] for r in get_robots()}
+        with ThreadPoolExecutor(max_workers=_MIGRATION_WORKERS) as ex:
+            list(ex.map(lambda op: save_operario(op, robot_map=robot_map), operarios))
         print("  OK")
 
     # 3. Pedidos
     ped_dir = data_dir / "pedidos"
     if ped_dir.exists():
-        for ped_file in ped_dir.glob("*.json"):
+        def _migrate_pedido(ped_file):
             with open(ped_file, "r", encoding="utf-8") as f:
                 items = json.load(f)
             nombre = ped_file.stem
             print(f"  Pedido '{nombre}': {len(items)} items...")
             save_pedido(nombre, items)
+
+        with ThreadPoolExecutor(max_workers=_MIGRATION_WORKERS) as ex:
+            list(ex.map(_migrate_pedido, ped_dir.glob("*.json")))
         print("  OK")
 
     # 4. Restricciones
@@ -799,14 +764,26 @@ def migrate_from_json():
             save_avance(semana, avance["modelos"])
             print("  OK")
 
-    # 6. Resultados
+    # 6. Resultados (secuencial: save_resultado calcula la version leyendo
+    #    la ultima de su base_name, en paralelo dos archivos chocarian)
+    #    El siguiente archivo se lee/parsea en segundo plano mientras se sube
+    #    el actual (un solo archivo adelantado en memoria).
     res_dir = data_dir / "resultados"
     if res_dir.exists():
-        for res_file in res_dir.glob("*.json"):
+        def _load_resultado(res_file):
             with open(res_file, "r", encoding="utf-8") as f:
-                resultado = json.load(f)
-            print(f"  Resultado '{resultado.get('nombre', res_file.stem)}'...")
-            save_resultado(resultado)
+                return res_file, json.load(f)
+
+        res_files = iter(res_dir.glob("*.json"))
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            nxt = next(res_files, None)
+            pending = ex.submit(_load_resultado, nxt) if nxt is not None else None
+            while pending is not None:
+                res_file, resultado = pending.result()
+                nxt = next(res_files, None)
+                pending = ex.submit(_load_resultado, nxt) if nxt is not None else None
+                print(f"  Resultado '{resultado.get('nombre', res_file.stem)}'...")
+                save_resultado(resultado)
         print("  OK")
 
     # 7. Modelo-Fabrica (desde config.json)
@@ -13,9 +13,16 @@ El formato generado coincide EXACTAMENTE con lo que espera _parse_pedido_sheet()
   Fila 5+: datos del pedido
 """
 
+from __future__ import annotations
+
+import functools
 from io import BytesIO
+from typing import IO
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
 
 
 # Estilos
@@ -26,22 +33,101 @@ _THIN_BORDER = Border(
     left=Side(style="thin"), right=Side(style="thin"),
     top=Side(style="thin"), bottom=Side(style="thin"),
 )
+_FONT_BOLD = Font(bold=True)
+_FONT_GREY = Font(color="999999")
+_FONT_TITLE = Font(bold=True, size=14)
+_FONT_MARKER = Font(italic=True, color="999999", size=9)
+_ALIGN_CENTER = Alignment(horizontal="center")
+_ALIGN_HEADER = Alignment(horizontal="center", wrap_text=True)
+
+# Fuente de la columna A de INSTRUCCIONES segun la etiqueta de la fila
+_FONT_BY_TAG = {"title": _FONT_TITLE, "sep": _FONT_GREY, "bold": _FONT_BOLD}
+
+# Contenido estatico de las hojas
+# (columna A, columna B, estilo de la columna A)
+_INSTRUCCIONES_ROWS = (
+    ("TEMPLATE DE IMPORTACION - PEDIDO SEMANAL", "", "title"),
+    ("", "", None),
+    ("Este archivo contiene la hoja PEDIDO", "donde se ingresan los modelos y volumenes a producir en la semana.", None),
+    ("", "", None),
+    ("=" * 50, "", "sep"),
+    ("FORMATO DE LA HOJA PEDIDO", "", None),
+    ("=" * 50, "", "sep"),
+    ("", "", None),
+    ("Fila 1", "Celda A1 = 'SEMANA', celda B1 = nombre de la semana (ej: sem_8_2026).", "bold"),
+    ("", "El nombre de la semana se usa como identificador del pedido.", None),
+    ("Fila 2", "Dejar vacia.", "bold"),
+    ("Fila 3", "Headers: MODELO | COLOR | FABRICA | VOLUMEN", "bold"),
+    ("", "NO modificar los nombres de los headers.", None),
+    ("Fila 4", "Indicadores de requerido/opcional (solo referencia, no se procesan).", "bold"),
+    ("Fila 5 en adelante", "Datos del pedido, una fila por item.", "bold"),
+    ("", "", None),
+    ("=" * 50, "", "sep"),
+    ("COLUMNAS", "", None),
+    ("=" * 50, "", "sep"),
+    ("", "", None),
+    ("MODELO", "Numero del modelo (ej: 65413). REQUERIDO.", "bold"),
+    ("", "Debe coincidir con un modelo del catalogo cargado en el sistema.", None),
+    ("COLOR", "Color o variante (ej: NEGRO). Opcional.", "bold"),
+    ("FABRICA", "Fabrica asignada (ej: FABRICA 1). Opcional. Default: FABRICA 1.", "bold"),
+    ("VOLUMEN", "Cantidad de pares a producir. Entero mayor a 0. REQUERIDO.", "bold"),
+    ("", "", None),
+    ("=" * 50, "", "sep"),
+    ("NOTAS IMPORTANTES", "", None),
+    ("=" * 50, "", "sep"),
+    ("", "", None),
+    ("1.", "Las filas de ejemplo (fondo gris) deben ELIMINARSE antes de importar.", "bold"),
+    ("2.", "No dejar filas vacias entre los datos.", "bold"),
+    ("3.", "El MODELO debe existir previamente en el catalogo del sistema.", "bold"),
+    ("4.", "El VOLUMEN debe ser un numero entero positivo (ej: 100, 200, 500).", "bold"),
+    ("5.", "Si no se especifica FABRICA, se asigna 'FABRICA 1' por defecto.", "bold"),
+    ("6.", "Se puede importar el mismo pedido varias veces; los datos se reemplazan.", "bold"),
+)
+
+_PEDIDO_EXAMPLES = (
+    ("65413", "NE", "FABRICA 1", 500),
+    ("77525", "NE", "FABRICA 2", 300),
+    ("94750", "AA", "FABRICA 1", 200),
+)
+
+
+# El workbook es write-only: las filas se emiten en orden con ws.append() y
+# los estilos van en WriteOnlyCell antes de agregar la fila.
+
+def _cell(ws, value, font=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    return cell
+
+
+def _register_styles(wb):
+    """Registra los estilos de header y ejemplo una vez por workbook."""
+    wb.add_named_style(NamedStyle(
+        name="pespunte_header", font=_HEADER_FONT, fill=_HEADER_FILL,
+        alignment=_ALIGN_HEADER, border=_THIN_BORDER,
+    ))
+    wb.add_named_style(NamedStyle(
+        name="pespunte_example", font=DEFAULT_FONT, fill=_EXAMPLE_FILL,
+        border=_THIN_BORDER,
+    ))
+
 
+def _styled_row(ws, values, style):
+    cells = []
+    for v in values:
+        cell = WriteOnlyCell(ws, value=v)
+        cell.style = style
+        cells.append(cell)
+    return cells
 
-def _style_header(ws, row, cols):
-    for c in range(1, cols + 1):
-        cell = ws.cell(row=row, column=c)
-        cell.font = _HEADER_FONT
-        cell.fill = _HEADER_FILL
-        cell.alignment = Alignment(horizontal="center", wrap_text=True)
-        cell.border = _THIN_BORDER
 
+def _style_header(ws, values):
+    return _styled_row(ws, values, "pespunte_header")
 
-def _style_example(ws, row, cols):
-    for c in range(1, cols + 1):
-        cell = ws.cell(row=row, column=c)
-        cell.fill = _EXAMPLE_FILL
-        cell.border = _THIN_BORDER
+
+def _style_example(ws, values):
+    return _styled_row(ws, values, "pespunte_example")
 
 
 def _build_instrucciones(wb):
@@ -50,110 +136,71 @@ def _build_instrucciones(wb):
     ws.column_dimensions["A"].width = 22
     ws.column_dimensions["B"].width = 80
 
-    rows = [
-        ("TEMPLATE DE IMPORTACION - PEDIDO SEMANAL", ""),
-        ("", ""),
-        ("Este archivo contiene la hoja PEDIDO", "donde se ingresan los modelos y volumenes a producir en la semana."),
-        ("", ""),
-        ("=" * 50, ""),
-        ("FORMATO DE LA HOJA PEDIDO", ""),
-        ("=" * 50, ""),
-        ("", ""),
-        ("Fila 1", "Celda A1 = 'SEMANA', celda B1 = nombre de la semana (ej: sem_8_2026)."),
-        ("", "El nombre de la semana se usa como identificador del pedido."),
-        ("Fila 2", "Dejar vacia."),
-        ("Fila 3", "Headers: MODELO | COLOR | FABRICA | VOLUMEN"),
-        ("", "NO modificar los nombres de los headers."),
-        ("Fila 4", "Indicadores de requerido/opcional (solo referencia, no se procesan)."),
-        ("Fila 5 en adelante", "Datos del pedido, una fila por item."),
-        ("", ""),
-        ("=" * 50, ""),
-        ("COLUMNAS", ""),
-        ("=" * 50, ""),
-        ("", ""),
-        ("MODELO", "Numero del modelo (ej: 65413). REQUERIDO."),
-        ("", "Debe coincidir con un modelo del catalogo cargado en el sistema."),
-        ("COLOR", "Color o variante (ej: NEGRO). Opcional."),
-        ("FABRICA", "Fabrica asignada (ej: FABRICA 1). Opcional. Default: FABRICA 1."),
-        ("VOLUMEN", "Cantidad de pares a producir. Entero mayor a 0. REQUERIDO."),
-        ("", ""),
-        ("=" * 50, ""),
-        ("NOTAS IMPORTANTES", ""),
-        ("=" * 50, ""),
-        ("", ""),
-        ("1.", "Las filas de ejemplo (fondo gris) deben ELIMINARSE antes de importar."),
-        ("2.", "No dejar filas vacias entre los datos."),
-        ("3.", "El MODELO debe existir previamente en el catalogo del sistema."),
-        ("4.", "El VOLUMEN debe ser un numero entero positivo (ej: 100, 200, 500)."),
-        ("5.", "Si no se especifica FABRICA, se asigna 'FABRICA 1' por defecto."),
-        ("6.", "Se puede importar el mismo pedido varias veces; los datos se reemplazan."),
-    ]
-
-    for i, (a, b) in enumerate(rows, 1):
-        ws.cell(row=i, column=1, value=a)
-        ws.cell(row=i, column=2, value=b)
-        if a and a.startswith("="):
-            ws.cell(row=i, column=1).font = Font(color="999999")
-        elif i == 1:
-            ws.cell(row=i, column=1).font = Font(bold=True, size=14)
-        elif a in ("MODELO", "COLOR", "FABRICA", "VOLUMEN",
-                    "Fila 1", "Fila 2", "Fila 3", "Fila 4", "Fila 5 en adelante"):
-            ws.cell(row=i, column=1).font = Font(bold=True)
-        elif a in ("1.", "2.", "3.", "4.", "5.", "6."):
-            ws.cell(row=i, column=1).font = Font(bold=True)
+    for a, b, tag in _INSTRUCCIONES_ROWS:
+        ws.append([_cell(ws, a, _FONT_BY_TAG.get(tag)), b])
 
 
 def _build_pedido(wb):
     ws = wb.create_sheet("PEDIDO")
     ws.sheet_properties.tabColor = "F59E0B"
 
+    # Anchos de columna
+    widths = [12, 12, 14, 10]
+    for i, w in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = w
+
     # Row 1: SEMANA (parser lee B1 para el nombre)
-    ws.cell(row=1, column=1, value="SEMANA")
-    ws.cell(row=1, column=1).font = Font(bold=True)
-    ws.cell(row=1, column=2, value="sem_XX_2026")
+    ws.append([_cell(ws, "SEMANA", _FONT_BOLD), "sem_XX_2026"])
 
     # Row 2: vacia (parser la ignora)
+    ws.append([])
 
     # Row 3: Headers (parser lee estos headers para mapear columnas)
     headers = ["MODELO", "COLOR", "FABRICA", "VOLUMEN"]
-    for c, h in enumerate(headers, 1):
-        ws.cell(row=3, column=c, value=h)
-    _style_header(ws, 3, len(headers))
+    ws.append(_style_header(ws, headers))
 
     # Row 4: requerido/opcional (parser no lee esta fila)
     markers = ["requerido", "opcional", "opcional", "requerido"]
-    for c, m in enumerate(markers, 1):
-        cell = ws.cell(row=4, column=c, value=m)
-        cell.font = Font(italic=True, color="999999", size=9)
-        cell.alignment = Alignment(horizontal="center")
+    row = []
+    for m in markers:
+        cell = _cell(ws, m, _FONT_MARKER)
+        cell.alignment = _ALIGN_CENTER
+        row.append(cell)
+    ws.append(row)
 
     # Filas de ejemplo (fila 5+, parser lee desde fila 5)
-    examples = [
-        ["65413", "NE", "FABRICA 1", 500],
-        ["77525", "NE", "FABRICA 2", 300],
-        ["94750", "AA", "FABRICA 1", 200],
-    ]
-    for row_idx, data in enumerate(examples, 5):
-        for c, val in enumerate(data, 1):
-            ws.cell(row=row_idx, column=c, value=val)
-        _style_example(ws, row_idx, len(headers))
-
-    # Anchos de columna
-    widths = [12, 12, 14, 10]
-    for i, w in enumerate(widths, 1):
-        ws.column_dimensions[ws.cell(row=1, column=i).column_letter].width = w
+    for data in _PEDIDO_EXAMPLES:
+        ws.append(_style_example(ws, data))
 
 
-def generate_template() -> BytesIO:
-    """Genera template Excel para pedido y retorna como BytesIO buffer."""
-    wb = Workbook()
-    # Eliminar hoja default
-    wb.remove(wb.active)
+@functools.lru_cache(maxsize=1)
+def _template_bytes() -> bytes:
+    """Serializa el template. El contenido es estatico: se arma una vez por proceso."""
+    # write_only: sin objetos Cell por celda, el XML se escribe en streaming
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
 
     _build_instrucciones(wb)
     _build_pedido(wb)
 
     buf = BytesIO()
     wb.save(buf)
-    buf.seek(0)
-    return buf
+    return buf.getvalue()
+
+
+def generate_template(stream: IO[bytes] | None = None) -> IO[bytes]:
+    """
+    Genera template Excel para pedido.
+    Si se pasa stream (cualquier objeto con write), el xlsx se escribe ahi
+    directamente y, si es seekable, queda posicionado al inicio del xlsx;
+    si no, se retorna un BytesIO posicionado al inicio.
+    """
+    data = _template_bytes()
+    if stream is None:
+        return BytesIO(data)
+    seekable = getattr(stream, "seekable", None)
+    start = stream.tell() if seekable is not None and seekable() else None
+    stream.write(data)
+    if start is not None:
+        stream.seek(start)
+    return stream
@@ -0,0 +1,45 @@
+-- Catalogo anidado en una sola llamada RPC.
+-- Antes: get_catalogo traia modelos y operaciones (con robots embebidos) por
+-- separado y armaba el anidado en Python.
+-- Ahora: el join y la agregacion a JSON se hacen en el servidor; el cliente
+-- solo llama sb.rpc("catalogo_nested") y no recibe columnas repetidas.
+
+CREATE OR REPLACE FUNCTION catalogo_nested()
+RETURNS JSONB
+LANGUAGE SQL
+STABLE
+SET search_path = public
+AS $$
+  SELECT COALESCE(jsonb_agg(
+    jsonb_build_object(
+      'modelo_num', m.modelo_num,
+      'codigo_full', m.codigo_full,
+      'alternativas', m.alternativas,
+      'clave_material', m.clave_material,
+      'total_sec_per_pair', m.total_sec_per_pair,
+      'operations', COALESCE((
+        SELECT jsonb_agg(
+          jsonb_build_object(
+            'fraccion', o.fraccion,
+            'operacion', o.operacion,
+            'input_o_proceso', o.input_o_proceso,
+            'etapa', o.etapa,
+            'recurso', o.recurso,
+            'recurso_raw', o.recurso_raw,
+            'rate', o.rate,
+            'sec_per_pair', o.sec_per_pair,
+            'robots', COALESCE((
+              SELECT jsonb_agg(r.nombre)
+              FROM catalogo_operacion_robots cor
+              JOIN robots r ON r.id = cor.robot_id
+              WHERE cor.operacion_id = o.id
+            ), '[]'::jsonb)
+          ) ORDER BY o.fraccion
+        )
+        FROM catalogo_operaciones o
+        WHERE o.modelo_id = m.id
+      ), '[]'::jsonb)
+    )
+  ), '[]'::jsonb)
+  FROM catalogo_modelos m;
+$$;
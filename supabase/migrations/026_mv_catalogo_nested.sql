@@ -0,0 +1,93 @@
+-- Cache del catalogo anidado en una vista materializada.
+-- El catalogo casi no cambia pero get_catalogo se llama en cada optimizacion;
+-- catalogo_nested() (025) recalcula los joins cada vez.
+-- Se escribe desde varios lados (frontend, import de Excel, save_catalogo),
+-- asi que en vez de refrescar desde un solo caller, triggers por sentencia
+-- marcan la vista como sucia y el lector la refresca solo si hace falta.
+
+-- 1. Vista materializada (id constante: REFRESH CONCURRENTLY exige un
+--    indice unico sobre columnas)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_catalogo_nested AS
+  SELECT 1 AS id, catalogo_nested() AS payload;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_catalogo_nested_id
+  ON mv_catalogo_nested(id);
+
+-- Las vistas materializadas no tienen RLS: solo se lee via
+-- catalogo_nested_cached(), que exige rol authenticated (ver 003).
+REVOKE ALL ON mv_catalogo_nested FROM PUBLIC, anon, authenticated;
+
+-- 2. Bandera de invalidacion (una sola fila)
+CREATE TABLE IF NOT EXISTS catalogo_cache_estado (
+  id     INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  dirty  BOOLEAN NOT NULL DEFAULT false
+);
+
+INSERT INTO catalogo_cache_estado (id, dirty) VALUES (1, false)
+  ON CONFLICT (id) DO NOTHING;
+
+-- Interna: sin politicas, solo las funciones SECURITY DEFINER la tocan
+ALTER TABLE catalogo_cache_estado ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON catalogo_cache_estado FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION marcar_catalogo_dirty()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE catalogo_cache_estado SET dirty = true WHERE id = 1 AND NOT dirty;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_catalogo_modelos_dirty ON catalogo_modelos;
+CREATE TRIGGER trg_catalogo_modelos_dirty
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON catalogo_modelos
+  FOR EACH STATEMENT EXECUTE FUNCTION marcar_catalogo_dirty();
+
+DROP TRIGGER IF EXISTS trg_catalogo_operaciones_dirty ON catalogo_operaciones;
+CREATE TRIGGER trg_catalogo_operaciones_dirty
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON catalogo_operaciones
+  FOR EACH STATEMENT EXECUTE FUNCTION marcar_catalogo_dirty();
+
+DROP TRIGGER IF EXISTS trg_catalogo_operacion_robots_dirty ON catalogo_operacion_robots;
+CREATE TRIGGER trg_catalogo_operacion_robots_dirty
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON catalogo_operacion_robots
+  FOR EACH STATEMENT EXECUTE FUNCTION marcar_catalogo_dirty();
+
+DROP TRIGGER IF EXISTS trg_robots_catalogo_dirty ON robots;
+CREATE TRIGGER trg_robots_catalogo_dirty
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON robots
+  FOR EACH STATEMENT EXECUTE FUNCTION marcar_catalogo_dirty();
+
+-- 3. Lector: refresca solo si esta sucia. La bandera se lee sin bloqueo; solo
+--    si esta sucia se toma FOR UPDATE y se re-chequea, asi las lecturas con
+--    cache limpia no se serializan y una escritura concurrente no se pierde
+--    al limpiar la bandera.
+CREATE OR REPLACE FUNCTION catalogo_nested_cached()
+RETURNS JSONB
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_dirty BOOLEAN;
+BEGIN
+  SELECT dirty INTO v_dirty FROM catalogo_cache_estado WHERE id = 1;
+  IF v_dirty THEN
+    SELECT dirty INTO v_dirty FROM catalogo_cache_estado WHERE id = 1 FOR UPDATE;
+    IF v_dirty THEN
+      REFRESH MATERIALIZED VIEW CONCURRENTLY mv_catalogo_nested;
+      UPDATE catalogo_cache_estado SET dirty = false WHERE id = 1;
+    END IF;
+  END IF;
+  RETURN (SELECT payload FROM mv_catalogo_nested WHERE id = 1);
+END;
+$$;
+
+-- SECURITY DEFINER salta el RLS de 003: no exponer a anon
+REVOKE EXECUTE ON FUNCTION catalogo_nested_cached() FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION catalogo_nested_cached() TO authenticated, service_role;
@@ -0,0 +1,24 @@
+-- Indices para los filtros/ordenes que usa supabase_manager.py y que los
+-- indices de 001 no cubren. Los FK de operario_*, pedido_items,
+-- avance_detalle y catalogo_operaciones ya tienen indice (001), y
+-- UNIQUE (modelo_id, fraccion) ya cubre el order("fraccion") por modelo.
+
+-- set_modelo_fabrica borra por fabrica_id; el UNIQUE (modelo_id, fabrica_id)
+-- empieza por modelo_id y no sirve para ese filtro.
+CREATE INDEX IF NOT EXISTS idx_modelo_fabrica_fabrica
+  ON modelo_fabrica(fabrica_id);
+
+-- get_avance / save_avance buscan la cabecera por semana.
+CREATE INDEX IF NOT EXISTS idx_avance_semana
+  ON avance(semana);
+
+-- get_restricciones filtra por semana y ordena por created_at.
+CREATE INDEX IF NOT EXISTS idx_restricciones_semana_created
+  ON restricciones(semana, created_at);
+DROP INDEX IF EXISTS idx_restricciones_semana;
+
+-- save_resultado lee la ultima version de un base_name (ORDER BY version
+-- DESC LIMIT 1): con el indice compuesto es un solo index scan.
+CREATE INDEX IF NOT EXISTS idx_resultados_base_version
+  ON resultados(base_name, version DESC);
+DROP INDEX IF EXISTS idx_resultados_base;
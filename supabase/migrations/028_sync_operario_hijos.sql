@@ -0,0 +1,36 @@
+-- Sincroniza recursos, robots y dias de un operario en una sola llamada RPC.
+-- Antes: save_operario borraba todas las filas hijas y las reinsertaba
+-- (6+ round trips y escrituras aunque nada cambiara).
+-- Ahora: solo se borra lo que sobra y se inserta lo que falta, en una
+-- transaccion.
+
+CREATE OR REPLACE FUNCTION sync_operario_hijos(
+  p_operario_id UUID,
+  p_recursos    TEXT[],
+  p_robot_ids   UUID[],
+  p_dias        TEXT[]
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+  DELETE FROM operario_recursos
+   WHERE operario_id = p_operario_id AND recurso <> ALL(p_recursos);
+  INSERT INTO operario_recursos (operario_id, recurso)
+    SELECT p_operario_id, r FROM unnest(p_recursos) AS r
+    ON CONFLICT (operario_id, recurso) DO NOTHING;
+
+  DELETE FROM operario_robots
+   WHERE operario_id = p_operario_id AND robot_id <> ALL(p_robot_ids);
+  INSERT INTO operario_robots (operario_id, robot_id)
+    SELECT p_operario_id, r FROM unnest(p_robot_ids) AS r
+    ON CONFLICT (operario_id, robot_id) DO NOTHING;
+
+  DELETE FROM operario_dias
+   WHERE operario_id = p_operario_id AND dia::TEXT <> ALL(p_dias);
+  INSERT INTO operario_dias (operario_id, dia)
+    SELECT p_operario_id, d::day_name FROM unnest(p_dias) AS d
+    ON CONFLICT (operario_id, dia) DO NOTHING;
+END;
+$$;
@@ -0,0 +1,138 @@
+-- Guardado atomico de catalogo, pedido y operario via RPC.
+-- Antes: save_catalogo / save_pedido / save_operario emitian varias
+-- sentencias autocommit; un fallo a medias dejaba la BD inconsistente.
+-- Ahora: cada guardado es una funcion plpgsql (una transaccion, un round trip)
+-- que recibe el mismo payload JSON que ya arma supabase_manager.py.
+
+-- 1. Catalogo: {modelo_num: {codigo_full, alternativas, ..., operations: [...]}}
+CREATE OR REPLACE FUNCTION save_catalogo_rpc(p_catalogo JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO catalogo_modelos
+    (modelo_num, codigo_full, alternativas, clave_material, total_sec_per_pair, num_ops)
+  SELECT
+    e.key,
+    COALESCE(e.value->>'codigo_full', e.key),
+    CASE WHEN jsonb_typeof(e.value->'alternativas') = 'array'
+         THEN ARRAY(SELECT jsonb_array_elements_text(e.value->'alternativas'))
+         ELSE '{}' END,
+    COALESCE(e.value->>'clave_material', ''),
+    COALESCE((e.value->>'total_sec_per_pair')::NUMERIC::INT, 0),
+    COALESCE(jsonb_array_length(e.value->'operations'), 0)
+  FROM jsonb_each(p_catalogo) e
+  ON CONFLICT (modelo_num) DO UPDATE SET
+    codigo_full        = EXCLUDED.codigo_full,
+    alternativas       = EXCLUDED.alternativas,
+    clave_material     = EXCLUDED.clave_material,
+    total_sec_per_pair = EXCLUDED.total_sec_per_pair,
+    num_ops            = EXCLUDED.num_ops;
+
+  -- Borrar operaciones viejas (cascade borra catalogo_operacion_robots)
+  DELETE FROM catalogo_operaciones o
+   USING catalogo_modelos m
+   WHERE o.modelo_id = m.id
+     AND m.modelo_num IN (SELECT jsonb_object_keys(p_catalogo));
+
+  INSERT INTO catalogo_operaciones
+    (modelo_id, fraccion, operacion, input_o_proceso, etapa, recurso,
+     recurso_raw, rate, sec_per_pair)
+  SELECT
+    m.id,
+    (op->>'fraccion')::INT,
+    op->>'operacion',
+    COALESCE(op->>'input_o_proceso', 'PRELIMINARES')::process_type,
+    COALESCE(op->>'etapa', ''),
+    op->>'recurso',
+    COALESCE(op->>'recurso_raw', ''),
+    COALESCE((op->>'rate')::NUMERIC, 0),
+    COALESCE((op->>'sec_per_pair')::NUMERIC::INT, 0)
+  FROM jsonb_each(p_catalogo) e
+  JOIN catalogo_modelos m ON m.modelo_num = e.key
+  CROSS JOIN LATERAL jsonb_array_elements(COALESCE(e.value->'operations', '[]'::jsonb)) op;
+
+  -- Robots por nombre; los que no existen se ignoran
+  INSERT INTO catalogo_operacion_robots (operacion_id, robot_id)
+  SELECT DISTINCT o.id, r.id
+  FROM jsonb_each(p_catalogo) e
+  JOIN catalogo_modelos m ON m.modelo_num = e.key
+  CROSS JOIN LATERAL jsonb_array_elements(COALESCE(e.value->'operations', '[]'::jsonb)) op
+  JOIN catalogo_operaciones o
+    ON o.modelo_id = m.id AND o.fraccion = (op->>'fraccion')::INT
+  CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(op->'robots', '[]'::jsonb)) rn
+  JOIN robots r ON r.nombre = rn;
+END;
+$$;
+
+-- 2. Pedido: reemplaza los items del pedido (lo crea si no existe)
+CREATE OR REPLACE FUNCTION save_pedido_rpc(p_nombre TEXT, p_items JSONB)
+RETURNS UUID
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_id UUID;
+BEGIN
+  INSERT INTO pedidos (nombre) VALUES (p_nombre)
+  ON CONFLICT (nombre) DO UPDATE SET nombre = EXCLUDED.nombre
+  RETURNING id INTO v_id;
+
+  DELETE FROM pedido_items WHERE pedido_id = v_id;
+
+  INSERT INTO pedido_items
+    (pedido_id, modelo_num, color, clave_material, fabrica, volumen)
+  SELECT
+    v_id,
+    it->>'modelo',
+    COALESCE(it->>'color', ''),
+    COALESCE(it->>'clave_material', ''),
+    COALESCE(it->>'fabrica', ''),
+    (it->>'volumen')::INT
+  FROM jsonb_array_elements(p_items) it;
+
+  RETURN v_id;
+END;
+$$;
+
+-- 3. Operario: upsert + fabrica por nombre + hijos (sync_operario_hijos, 028)
+CREATE OR REPLACE FUNCTION save_operario_rpc(p_operario JSONB, p_robot_ids UUID[])
+RETURNS JSONB
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  v_fab UUID;
+  v_row operarios;
+BEGIN
+  SELECT id INTO v_fab FROM fabricas
+   WHERE nombre = NULLIF(p_operario->>'fabrica', '');
+
+  INSERT INTO operarios (id, nombre, fabrica_id, eficiencia, activo)
+  VALUES (
+    COALESCE((p_operario->>'id')::UUID, gen_random_uuid()),
+    p_operario->>'nombre',
+    v_fab,
+    COALESCE((p_operario->>'eficiencia')::NUMERIC, 1.0),
+    COALESCE((p_operario->>'activo')::BOOLEAN, TRUE)
+  )
+  ON CONFLICT (id) DO UPDATE SET
+    nombre     = EXCLUDED.nombre,
+    fabrica_id = EXCLUDED.fabrica_id,
+    eficiencia = EXCLUDED.eficiencia,
+    activo     = EXCLUDED.activo
+  RETURNING * INTO v_row;
+
+  PERFORM sync_operario_hijos(
+    v_row.id,
+    ARRAY(SELECT jsonb_array_elements_text(
+      COALESCE(p_operario->'recursos_habilitados', '[]'::jsonb))),
+    COALESCE(p_robot_ids, '{}'),
+    ARRAY(SELECT jsonb_array_elements_text(
+      COALESCE(p_operario->'dias_disponibles', '[]'::jsonb)))
+  );
+
+  RETURN to_jsonb(v_row);
+END;
+$$;